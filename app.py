@@ -1,8 +1,16 @@
-from flask import Flask, request, jsonify, render_template
-from models import db, Product, PriceHistory
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
+from models import db, Product, PriceHistory, ScrapeJob
 from config import Config
-from datetime import datetime
+from migrations import run_migrations
+from utils.scheduling import DueQueue, ViewCounter
+from utils.metrics import timed, render_prometheus
+from datetime import datetime, timedelta
+from sqlalchemy import func, case
 from apscheduler.schedulers.background import BackgroundScheduler
+import atexit
+import base64
+import click
+import json
 import os
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -10,50 +18,250 @@ app.config.from_object(Config)
 # Initialize database
 db.init_app(app)
 
-# Create tables
-with app.app_context():
-    db.create_all()
-    print("✅ Database tables created successfully!")
-
-# Background scheduler for auto re-scrape
-def auto_rescrape_all():
-    """Background job to re-scrape all products"""
+# Create tables - but not in parse-pool processes: spawn re-imports the
+# script that started them (python app.py) as __mp_main__, and several
+# children running DDL at once would race the real process
+if __name__ != '__mp_main__':
     with app.app_context():
-        from utils.scraper import scrape_product
-        
-        print("🔄 AUTO RE-SCRAPE: Starting...")
-        products = Product.query.all()
-        
-        for product in products:
+        db.create_all()
+        run_migrations(db)
+        print("✅ Database tables created successfully!")
+
+# Products waiting for their next scrape, soonest first
+due_queue = DueQueue()
+# History views not yet added to Product.view_count
+view_counter = ViewCounter()
+
+
+def iter_rescrape(product_ids=None, after_id=0):
+    """
+    Re-scrape products concurrently (all of them when product_ids is None),
+    store each result and schedule the product's next scrape, yielding
+    (product_id, outcome, result) as scrapes finish - outcome is 'updated',
+    'unchanged' or 'failed'. Must run inside an app context.
+    
+    Products are handled in id order, RESCRAPE_CHUNK_SIZE at a time, and
+    each chunk is committed on its own: memory stays flat however many
+    products there are, and an interrupted run can carry on from the last
+    committed id with after_id.
+    """
+    chunk_size = app.config['RESCRAPE_CHUNK_SIZE']
+    columns = (Product.id, Product.url, Product.etag, Product.last_modified, Product.content_hash)
+    
+    if product_ids is not None:
+        product_ids = sorted(pid for pid in set(product_ids) if pid > after_id)
+        for start in range(0, len(product_ids), chunk_size):
+            chunk_ids = product_ids[start:start + chunk_size]
+            rows = Product.query.with_entities(*columns).filter(Product.id.in_(chunk_ids)).all()
+            yield from rescrape_chunk(rows)
+        return
+    
+    # Keyset pagination rather than one long-lived yield_per cursor, which
+    # wouldn't survive the per-chunk commits on Postgres
+    last_id = after_id
+    while True:
+        rows = Product.query.with_entities(*columns) \
+            .filter(Product.id > last_id).order_by(Product.id).limit(chunk_size).all()
+        if not rows:
+            return
+        yield from rescrape_chunk(rows)
+        last_id = rows[-1].id
+        print(f"💾 Committed re-scrapes up to product #{last_id}")
+
+
+def rescrape_chunk(rows):
+    """Scrape one chunk of (id, url, validators...) rows and commit its results together"""
+    from utils.scraper import scrape_product
+    from utils.rescrape import scrape_many
+    
+    # Only plain values go to the worker threads - they never touch the session
+    targets = [(row.id, row.url) for row in rows]
+    validators = {
+        row.url: {'etag': row.etag, 'last_modified': row.last_modified, 'content_hash': row.content_hash}
+        for row in rows
+    }
+    
+    results = scrape_many(
+        targets,
+        lambda url: scrape_product(url, validators[url]),
+        max_workers=app.config['RESCRAPE_MAX_WORKERS'],
+        per_domain=app.config['RESCRAPE_PER_DOMAIN_LIMIT']
+    )
+    
+    # One SELECT for the chunk instead of a lookup per result
+    products = {p.id: p for p in Product.query.filter(Product.id.in_([pid for pid, _ in targets]))}
+    # ...and one for the runs that unchanged prices extend
+    latest_rows = None
+    if app.config['PRICE_HISTORY_MODE'] == 'changes':
+        latest_rows = PriceHistory.latest_for(products)
+    history_rows = []
+    scheduled = []
+    try:
+        for product_id, result in results:
             try:
-                print(f"🔍 Re-scraping: {product.title[:30]}...")
-                result = scrape_product(product.url)
+                product = products.get(product_id)
+                if not product:
+                    continue
                 
-                if result['success']:
-                    product.current_price = result['price']
-                    
-                    new_history = PriceHistory(
-                        product_id=product.id,
-                        price=result['price'],
-                        scraped_at=datetime.utcnow()
-                    )
-                    db.session.add(new_history)
-                    print(f"✅ Updated: ${result['price']}")
+                if result.get('not_modified'):
+                    product.record_check()
+                    # A new ETag on an unchanged price region still has to be kept
+                    product.set_validators(result.get('validators'))
+                    outcome = 'unchanged'
+                elif result['success']:
+                    # Bulk-imported products get their title from the first scrape
+                    product.title = product.title or result['title']
+                    product.record_price(result['price'], history_rows=history_rows, latest_rows=latest_rows)
+                    product.set_validators(result.get('validators'))
+                    outcome = 'updated'
+                    print(f"✅ Updated #{product_id}: ${result['price']}")
                 else:
-                    print(f"❌ Failed: {result['error']}")
+                    product.record_failure()
+                    outcome = 'failed'
+                    print(f"❌ Failed #{product_id}: {result['error']}")
+                
+                product.schedule_next()
+                scheduled.append((product_id, product.next_scrape_at))
                     
             except Exception as e:
                 print(f"❌ Error: {str(e)}")
                 continue
+            
+            yield product_id, outcome, result
+    finally:
+        # Also on early exit (e.g. a streaming client went away)
+        with timed('db_write_seconds', operation='rescrape_chunk'):
+            PriceHistory.bulk_insert(history_rows)
+            db.session.commit()
+        for product_id, next_scrape_at in scheduled:
+            due_queue.push(product_id, next_scrape_at)
+
+
+def rescrape_products(product_ids=None, after_id=0):
+    """Re-scrape products (see iter_rescrape) and return counts per outcome"""
+    stats = {'updated': 0, 'unchanged': 0, 'failed': 0, 'total': 0}
+    for _, outcome, _ in iter_rescrape(product_ids, after_id):
+        stats[outcome] += 1
+        stats['total'] += 1
+    return stats
+
+
+# Background scheduler for auto re-scrape
+def auto_rescrape_all(after_id=0):
+    """Re-scrape every product right now (manual full pass), optionally resuming after a product id"""
+    with app.app_context():
+        print("🔄 AUTO RE-SCRAPE: Starting...")
+        stats = rescrape_products(after_id=after_id)
+        print(f"🔄 AUTO RE-SCRAPE: Complete! ({stats['updated']} updated, "
+              f"{stats['unchanged']} unchanged, {stats['failed']} failed, {stats['total']} total)")
+
+
+def load_due_queue():
+    """(Re)build the due queue from next_scrape_at - never-scheduled products are due now"""
+    with app.app_context():
+        due_queue.reset(Product.query.with_entities(Product.id, Product.next_scrape_at).all())
+        print(f"🗓️ Due queue loaded: {len(due_queue)} products")
+
+
+def dispatch_due_products():
+    """Scheduler tick: scrape whichever products are due, most overdue first"""
+    with app.app_context():
+        product_ids = due_queue.pop_due(limit=app.config['SCHEDULER_BATCH_SIZE'])
+        if not product_ids:
+            return
+        
+        print(f"🔄 DISPATCH: {len(product_ids)} products due")
+        stats = rescrape_products(product_ids)
+        print(f"🔄 DISPATCH: Complete! ({stats['updated']} updated, "
+              f"{stats['unchanged']} unchanged, {stats['failed']} failed)")
+
+
+def enqueue_due_products():
+    """Scheduler tick with DISPATCH_TO_WORKERS: hand due products to the worker pool"""
+    with app.app_context():
+        now = datetime.utcnow()
+        product_ids = [product_id for (product_id,) in Product.query.with_entities(Product.id)
+                       .filter(db.or_(Product.next_scrape_at.is_(None), Product.next_scrape_at <= now))
+                       .order_by(Product.next_scrape_at)
+                       .limit(app.config['SCHEDULER_BATCH_SIZE'])]
+        if not product_ids:
+            return
         
+        # Lease them so the next tick doesn't enqueue them again; the worker
+        # sets the real next_scrape_at once it has scraped them
+        db.session.execute(
+            db.update(Product)
+            .where(Product.id.in_(product_ids))
+            .values(next_scrape_at=now + timedelta(minutes=app.config['JOB_TIMEOUT_MINUTES']))
+        )
+        size = app.config['JOB_BATCH_SIZE']
+        for start in range(0, len(product_ids), size):
+            ScrapeJob.enqueue('rescrape_batch', product_ids=product_ids[start:start + size])
         db.session.commit()
-        print("🔄 AUTO RE-SCRAPE: Complete!")
+        print(f"🔄 DISPATCH: queued {len(product_ids)} due products for workers")
+
+
+def flush_view_counts():
+    """Add buffered history views to view_count in one UPDATE; on failure keep them for next time"""
+    counts = view_counter.drain()
+    if not counts:
+        return
+    
+    with app.app_context():
+        try:
+            db.session.execute(
+                db.update(Product)
+                .where(Product.id.in_(list(counts)))
+                .values(view_count=Product.view_count + case(counts, value=Product.id, else_=0))
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            view_counter.restore(counts)
+            print(f"⚠️ Couldn't save view counts, will retry: {e}")
+
 
-# Initialize and start scheduler
 scheduler = BackgroundScheduler()
-scheduler.add_job(func=auto_rescrape_all, trigger="interval", hours=24)
-scheduler.start()
-print("🔄 Background scheduler started (re-scrapes every 24 hours)")
+
+
+def start_view_flusher():
+    """Periodically write buffered views (the web server runs this even without the dispatcher)"""
+    scheduler.add_job(
+        func=flush_view_counts,
+        trigger="interval",
+        seconds=app.config['VIEW_FLUSH_SECONDS'],
+        max_instances=1,
+        coalesce=True
+    )
+    atexit.register(flush_view_counts)
+    if not scheduler.running:
+        scheduler.start()
+
+
+def start_scheduler():
+    """Run the due-product dispatcher in this process (web app or one worker)"""
+    if app.config['DISPATCH_TO_WORKERS']:
+        dispatch = enqueue_due_products
+    else:
+        # Only this process pops the queue, so only it needs the pushes
+        due_queue.active = True
+        load_due_queue()
+        dispatch = dispatch_due_products
+        # Picks up products added or rescheduled by other processes
+        scheduler.add_job(func=load_due_queue, trigger="interval", hours=1)
+    
+    scheduler.add_job(
+        func=dispatch,
+        trigger="interval",
+        minutes=app.config['SCHEDULER_TICK_MINUTES'],
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()
+    )
+    if not scheduler.running:
+        scheduler.start()
+    print(f"🔄 Background scheduler started (checks for due products every {app.config['SCHEDULER_TICK_MINUTES']} minutes)")
+
 
 @app.route('/')
 def index():
@@ -64,6 +272,7 @@ def index():
 def add_product():
     """Add or update a product by scraping its URL"""
     try:
+        from utils.bulk_import import is_valid_url
         from utils.scraper import scrape_product
         
         data = request.get_json()
@@ -82,6 +291,12 @@ def add_product():
                 'error': 'URL cannot be empty'
             }), 400
         
+        if not is_valid_url(url):
+            return jsonify({
+                'success': False,
+                'error': 'URL must be an http(s) URL with a hostname'
+            }), 400
+        
         print(f"🔍 Scraping: {url}")
         scrape_result = scrape_product(url)
         
@@ -91,70 +306,8 @@ def add_product():
                 'error': scrape_result['error']
             }), 400
         
-        title = scrape_result['title']
-        price = scrape_result['price']
-        
-        print(f"✅ Scraped: {title} - ${price}")
-        
-        existing_product = Product.query.filter_by(url=url).first()
-        
-        if existing_product:
-            print(f"📦 Product exists (ID: {existing_product.id}). Updating...")
-            
-            existing_product.current_price = price
-            existing_product.title = title
-            
-            new_history = PriceHistory(
-                product_id=existing_product.id,
-                price=price,
-                scraped_at=datetime.utcnow()
-            )
-            db.session.add(new_history)
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Product updated successfully',
-                'product': {
-                    'id': existing_product.id,
-                    'title': existing_product.title,
-                    'url': existing_product.url,
-                    'current_price': existing_product.current_price,
-                    'price_history_count': len(existing_product.price_history)
-                }
-            }), 200
-        
-        else:
-            print(f"🆕 New product. Creating...")
-            
-            new_product = Product(
-                url=url,
-                title=title,
-                current_price=price,
-                created_at=datetime.utcnow()
-            )
-            db.session.add(new_product)
-            db.session.flush()
-            
-            first_history = PriceHistory(
-                product_id=new_product.id,
-                price=price,
-                scraped_at=datetime.utcnow()
-            )
-            db.session.add(first_history)
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Product added successfully',
-                'product': {
-                    'id': new_product.id,
-                    'title': new_product.title,
-                    'url': new_product.url,
-                    'current_price': new_product.current_price,
-                    'price_history_count': 1
-                }
-            }), 201
+        product, created = save_scraped_product(url, scrape_result)
+        return jsonify(saved_product_response(product, created)), 201 if created else 200
     
     except Exception as e:
         db.session.rollback()
@@ -165,6 +318,146 @@ def add_product():
         }), 500
 
 
+def save_scraped_product(url, scrape_result):
+    """Create or update the product for a successful scrape -> (product, created)"""
+    title = scrape_result['title']
+    price = scrape_result['price']
+    
+    print(f"✅ Scraped: {title} - ${price}")
+    
+    product = Product.query.filter_by(url=url).first()
+    created = product is None
+    
+    if created:
+        print(f"🆕 New product. Creating...")
+        product = Product(url=url, title=title, created_at=datetime.utcnow())
+        db.session.add(product)
+        db.session.flush()
+    else:
+        print(f"📦 Product exists (ID: {product.id}). Updating...")
+        product.title = title
+    
+    with timed('db_write_seconds', operation='save_product'):
+        product.record_price(price)
+        product.set_validators(scrape_result.get('validators'))
+        product.schedule_next()
+        db.session.commit()
+    due_queue.push(product.id, product.next_scrape_at)
+    return product, created
+
+
+def saved_product_response(product, created):
+    return {
+        'success': True,
+        'message': 'Product added successfully' if created else 'Product updated successfully',
+        'product': {
+            'id': product.id,
+            'title': product.title,
+            'url': product.url,
+            'current_price': product.current_price,
+            'price_history_count': product.history_count
+        }
+    }
+
+
+def import_products(urls):
+    """
+    Insert the URLs that aren't tracked yet -> {new product id: url}.
+    One query finds the existing ones; the rest go in as a single
+    multi-row INSERT. Titles and prices arrive with the first scrape.
+    """
+    existing = {url for (url,) in Product.query.with_entities(Product.url).filter(Product.url.in_(urls))}
+    new_urls = [url for url in urls if url not in existing]
+    if not new_urls:
+        return {}
+    
+    now = datetime.utcnow()
+    ids = db.session.execute(
+        db.insert(Product).returning(Product.id, sort_by_parameter_order=True),
+        [{'url': url, 'created_at': now} for url in new_urls]
+    ).scalars().all()
+    db.session.commit()
+    return dict(zip(ids, new_urls))
+
+
+def read_bulk_urls():
+    """URLs from a /products/bulk body: JSON list / {"urls": [...]}, CSV, JSONL or plain lines"""
+    from utils.bulk_import import detect_format, iter_urls
+    
+    if request.is_json:
+        data = request.get_json()
+        urls = data.get('urls') if isinstance(data, dict) else data
+        if not isinstance(urls, list):
+            raise ValueError('expected a list of URLs')
+        return urls
+    
+    text = request.get_data(as_text=True)
+    return list(iter_urls(text, detect_format(request.content_type)))
+
+
+@app.route('/products/bulk', methods=['POST'])
+def bulk_add_products():
+    """
+    Import many product URLs at once. Already-tracked URLs are skipped;
+    new ones are scraped concurrently and each result is streamed back as
+    a JSON line. With ?queue=1 the scrapes go to the workers as jobs instead.
+    """
+    from utils.bulk_import import clean_urls
+    
+    try:
+        urls, invalid = clean_urls(read_bulk_urls())
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Could not read URLs: {str(e)}'
+        }), 400
+    
+    if not urls:
+        return jsonify({
+            'success': False,
+            'error': 'No valid URLs in request body',
+            'invalid': invalid
+        }), 400
+    
+    created = import_products(urls)
+    summary = {
+        'submitted': len(urls) + len(invalid),
+        'created': len(created),
+        'existing': len(urls) - len(created),
+        'invalid': invalid
+    }
+    print(f"📥 Bulk import: {summary['created']} new, {summary['existing']} existing, {len(invalid)} invalid")
+    
+    if request.args.get('queue') == '1':
+        product_ids = list(created)
+        size = app.config['JOB_BATCH_SIZE']
+        jobs = [ScrapeJob.enqueue('rescrape_batch', product_ids=product_ids[start:start + size])
+                for start in range(0, len(product_ids), size)]
+        db.session.commit()
+        return jsonify(dict(summary, success=True, job_ids=[job.id for job in jobs])), 202
+    
+    def generate():
+        yield json.dumps(dict(summary, event='accepted')) + '\n'
+        
+        stats = {'updated': 0, 'unchanged': 0, 'failed': 0}
+        for done, (product_id, outcome, result) in enumerate(iter_rescrape(list(created)), 1):
+            stats[outcome] += 1
+            yield json.dumps({
+                'event': 'scraped',
+                'progress': f'{done}/{len(created)}',
+                'id': product_id,
+                'url': created[product_id],
+                'success': outcome != 'failed',
+                'title': result.get('title'),
+                'price': result.get('price'),
+                'error': result.get('error')
+            }) + '\n'
+        
+        yield json.dumps(dict(stats, event='done')) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
 @app.route('/products', methods=['GET'])
 def get_products():
     """Get all tracked products with trends"""
@@ -179,35 +472,250 @@ def get_products():
             'url': p.url,
             'current_price': p.current_price,
             'created_at': p.created_at.isoformat(),
-            'price_history_count': len(p.price_history),
+            'price_history_count': p.history_count,
             'price_trend': p.get_price_trend(),
-            'price_change_percent': p.get_price_change_percent()
+            'price_change_percent': p.get_price_change_percent(),
+            'min_price': p.min_price,
+            'max_price': p.max_price,
+            'last_scraped_at': p.last_scraped_at.isoformat() if p.last_scraped_at else None,
+            'next_scrape_at': p.next_scrape_at.isoformat() if p.next_scrape_at else None,
+            # Lets the dashboard badge a product with no price yet as Pending or Scrape failed
+            'consecutive_failures': p.consecutive_failures
         } for p in products]
     }), 200
 
 
+HISTORY_DEFAULT_LIMIT = 500
+HISTORY_MAX_LIMIT = 5000
+
+
+def encode_history_cursor(scraped_at, history_id):
+    raw = f"{scraped_at.isoformat()}|{history_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    scraped_at, history_id = raw.rsplit('|', 1)
+    return datetime.fromisoformat(scraped_at), int(history_id)
+
+
 @app.route('/product/<int:product_id>/history', methods=['GET'])
 def get_price_history(product_id):
-    """Get price history for a specific product"""
+    """
+    Get price history for a specific product, newest first.
+    
+    Query params: limit (default 500), cursor (next_cursor from the previous
+    page), since / until (ISO datetimes). Pages are keyset-based, so every
+    page is a bounded range scan on (product_id, scraped_at). limit counts
+    rows: in 'changes' mode a run row comes back as two points.
+    
+    For charts, points=N (LTTB) or bucket=1h|1d (min/max/avg per bucket)
+    return a downsampled series over since/until instead of raw pages.
+    """
     product = Product.query.get_or_404(product_id)
     
-    history = PriceHistory.query.filter_by(product_id=product_id).order_by(PriceHistory.scraped_at.desc()).all()
+    # Views (not follow-up pages) count towards popularity for the scheduler;
+    # buffered, so this read never waits on a write lock
+    if not request.args.get('cursor'):
+        view_counter.add(product_id)
+    
+    try:
+        points = request.args.get('points')
+        points = int(points) if points else None
+        bucket = request.args.get('bucket')
+        if bucket and bucket not in PriceHistory.BUCKETS:
+            raise ValueError(bucket)
+        limit = min(int(request.args.get('limit', HISTORY_DEFAULT_LIMIT)), HISTORY_MAX_LIMIT)
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+        cursor = request.args.get('cursor')
+        cursor = decode_history_cursor(cursor) if cursor else None
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid limit, cursor, since, until, points or bucket parameter'
+        }), 400
+    
+    if limit < 1 or (points is not None and points < 3):
+        return jsonify({
+            'success': False,
+            'error': 'limit must be at least 1 and points at least 3'
+        }), 400
+    
+    product_info = {
+        'id': product.id,
+        'title': product.title,
+        'url': product.url,
+        'current_price': product.current_price
+    }
+    
+    if bucket:
+        return jsonify({
+            'success': True,
+            'product': product_info,
+            'bucket': bucket,
+            'history': bucketed_history(product_id, bucket, since, until)
+        }), 200
+    
+    query = PriceHistory.query.with_entities(
+        PriceHistory.id, PriceHistory.price, PriceHistory.scraped_at, PriceHistory.last_confirmed_at,
+        PriceHistory.sample_count
+    ).filter(PriceHistory.product_id == product_id)
+    
+    # Runs overlapping the range, even if they started before it
+    if since:
+        query = query.filter(func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.scraped_at) >= since)
+    if until:
+        query = query.filter(PriceHistory.scraped_at < until)
+    
+    if points:
+        return jsonify({
+            'success': True,
+            'product': product_info,
+            'points': points,
+            'history': downsampled_history(query, points, since, until)
+        }), 200
+    
+    if cursor:
+        cursor_at, cursor_id = cursor
+        query = query.filter(
+            PriceHistory.scraped_at <= cursor_at,
+            db.or_(PriceHistory.scraped_at < cursor_at, PriceHistory.id < cursor_id)
+        )
+    
+    rows = query.order_by(PriceHistory.scraped_at.desc(), PriceHistory.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_history_cursor(rows[-1].scraped_at, rows[-1].id)
     
     return jsonify({
         'success': True,
-        'product': {
-            'id': product.id,
-            'title': product.title,
-            'url': product.url,
-            'current_price': product.current_price
-        },
+        'product': product_info,
         'history': [{
-            'price': h.price,
-            'scraped_at': h.scraped_at.isoformat()
-        } for h in history]
+            'price': price,
+            'scraped_at': scraped_at.isoformat()
+        } for scraped_at, price in expand_history(rows, since, until)],
+        'next_cursor': next_cursor
     }), 200
 
 
+def expand_history(rows, since=None, until=None):
+    """
+    (scraped_at, price) points from history rows, in the rows' order.
+    A run-length row (PRICE_HISTORY_MODE='changes') also yields its
+    last_confirmed_at point, so a run keeps its first and last scrape.
+    A run sticking out of since / until is clipped to its first and last
+    sample inside the range, with samples spread evenly as in
+    bucketed_history().
+    """
+    for h in rows:
+        first, count = h.scraped_at, h.sample_count or 1
+        if not h.last_confirmed_at or count < 2:
+            if not ((since and first < since) or (until and first >= until)):
+                yield first, h.price
+            continue
+        
+        step = (h.last_confirmed_at - first) / (count - 1)
+        low, high = 0, count - 1
+        if since and first < since:
+            low = -((first - since) // step) if step else count
+        if until and h.last_confirmed_at >= until:
+            high = (-((first - until) // step) - 1) if step else -1
+        if low > high:
+            continue
+        if high > low:
+            yield first + step * high, h.price
+        yield first + step * low, h.price
+
+
+def downsampled_history(query, points, since=None, until=None):
+    """LTTB over (timestamp, price) tuples - no ORM objects are built"""
+    from utils.downsample import lttb
+    
+    rows = query.order_by(PriceHistory.scraped_at.desc(), PriceHistory.id.desc()).all()
+    series = lttb([
+        (scraped_at.timestamp(), price, scraped_at)
+        for scraped_at, price in reversed(list(expand_history(rows, since, until)))
+    ], points)
+    
+    return [{
+        'price': price,
+        'scraped_at': scraped_at.isoformat()
+    } for _, price, scraped_at in reversed(series)]
+
+
+def bucketed_history(product_id, bucket, since=None, until=None):
+    """
+    min / max / avg per time bucket. Single-bucket rows are aggregated by the
+    database; runs ('changes' mode) that cross bucket boundaries have their
+    samples spread evenly between scraped_at and last_confirmed_at, so each
+    bucket they span gets its share, as it would in 'full' mode.
+    """
+    start_bucket = PriceHistory.bucket_expression(bucket)
+    end_bucket = PriceHistory.bucket_expression(bucket, PriceHistory.last_confirmed_at)
+    bucket_start = start_bucket.label('bucket_start')
+    
+    query = db.session.query(
+        bucket_start,
+        func.min(PriceHistory.price).label('min'),
+        func.max(PriceHistory.price).label('max'),
+        func.sum(PriceHistory.price * PriceHistory.sample_count).label('total'),
+        func.sum(PriceHistory.sample_count).label('samples')
+    ).filter(
+        PriceHistory.product_id == product_id,
+        db.or_(PriceHistory.last_confirmed_at.is_(None), end_bucket == start_bucket)
+    )
+    
+    if since:
+        query = query.filter(PriceHistory.scraped_at >= since)
+    if until:
+        query = query.filter(PriceHistory.scraped_at < until)
+    
+    buckets = {}
+    for row in query.group_by(bucket_start):
+        start = datetime.fromisoformat(row.bucket_start) if isinstance(row.bucket_start, str) else row.bucket_start
+        buckets[start] = [row.min, row.max, row.total, row.samples]
+    
+    runs = PriceHistory.query.with_entities(
+        PriceHistory.price, PriceHistory.scraped_at, PriceHistory.last_confirmed_at, PriceHistory.sample_count
+    ).filter(
+        PriceHistory.product_id == product_id,
+        PriceHistory.last_confirmed_at.isnot(None),
+        end_bucket != start_bucket
+    )
+    # Runs overlapping the range, even if they started before it
+    if since:
+        runs = runs.filter(PriceHistory.last_confirmed_at >= since)
+    if until:
+        runs = runs.filter(PriceHistory.scraped_at < until)
+    
+    for price, first, last, count in runs:
+        step = (last - first) / max(count - 1, 1)
+        for i in range(count):
+            moment = first + step * i
+            if (since and moment < since) or (until and moment >= until):
+                continue
+            start = PriceHistory.bucket_start(bucket, moment)
+            entry = buckets.setdefault(start, [price, price, 0.0, 0])
+            entry[0] = min(entry[0], price)
+            entry[1] = max(entry[1], price)
+            entry[2] += price
+            entry[3] += 1
+    
+    return [{
+        'scraped_at': start.isoformat(),
+        'price': round(total / samples, 2),
+        'min': low,
+        'max': high,
+        'samples': samples
+    } for start, (low, high, total, samples) in sorted(buckets.items(), reverse=True)]
+
+
 @app.route('/delete-product/<int:product_id>', methods=['DELETE'])
 def delete_product(product_id):
     """Delete a tracked product"""
@@ -218,6 +726,7 @@ def delete_product(product_id):
         
         db.session.delete(product)
         db.session.commit()
+        due_queue.discard(product_id)
         
         return jsonify({
             'success': True,
@@ -240,30 +749,9 @@ def rescrape_product(product_id):
         
         product = Product.query.get_or_404(product_id)
         
-        result = scrape_product(product.url)
-        
-        if result['success']:
-            product.current_price = result['price']
-            product.title = result['title']
-            
-            new_history = PriceHistory(
-                product_id=product.id,
-                price=result['price'],
-                scraped_at=datetime.utcnow()
-            )
-            db.session.add(new_history)
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Re-scraped successfully',
-                'new_price': result['price']
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'error': result['error']
-            }), 400
+        result = scrape_product(product.url, product.get_validators())
+        response, status = apply_rescrape(product, result)
+        return jsonify(response), status
             
     except Exception as e:
         db.session.rollback()
@@ -273,7 +761,217 @@ def rescrape_product(product_id):
         }), 500
 
 
+def apply_rescrape(product, result):
+    """Store one product's re-scrape result -> (response body, status code)"""
+    if result.get('not_modified'):
+        product.record_check()
+        product.set_validators(result.get('validators'))
+        product.schedule_next()
+        db.session.commit()
+        due_queue.push(product.id, product.next_scrape_at)
+        return {
+            'success': True,
+            'message': 'Price unchanged since last scrape',
+            'new_price': product.current_price
+        }, 200
+    
+    if not result['success']:
+        return {
+            'success': False,
+            'error': result['error']
+        }, 400
+    
+    product.title = result['title']
+    product.record_price(result['price'])
+    product.set_validators(result.get('validators'))
+    product.schedule_next()
+    db.session.commit()
+    due_queue.push(product.id, product.next_scrape_at)
+    
+    return {
+        'success': True,
+        'message': 'Re-scraped successfully',
+        'new_price': result['price']
+    }, 200
+
+
+def run_add_product_job(payload):
+    from utils.scraper import scrape_product
+    
+    url = payload['url']
+    print(f"🔍 Scraping: {url}")
+    scrape_result = scrape_product(url)
+    if not scrape_result['success']:
+        return {'success': False, 'error': scrape_result['error']}
+    
+    product, created = save_scraped_product(url, scrape_result)
+    return saved_product_response(product, created)
+
+
+def run_rescrape_job(payload):
+    from utils.scraper import scrape_product
+    
+    product = db.session.get(Product, payload['product_id'])
+    if product is None:
+        return {'success': False, 'error': 'Product no longer exists'}
+    
+    response, _ = apply_rescrape(product, scrape_product(product.url, product.get_validators()))
+    return response
+
+
+def run_rescrape_batch_job(payload):
+    return dict(rescrape_products(payload['product_ids']), success=True)
+
+
+# ScrapeJob.kind -> handler(payload) -> result dict; success=False fails the job
+JOB_HANDLERS = {
+    'add_product': run_add_product_job,
+    'rescrape': run_rescrape_job,
+    'rescrape_batch': run_rescrape_batch_job,
+}
+
+
+def queued_job_response(job):
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/jobs/{job.id}'
+    }), 202
+
+
+@app.route('/jobs/add-product', methods=['POST'])
+def enqueue_add_product():
+    """Queue an add-product scrape for the workers; poll /jobs/<id> for the result"""
+    data = request.get_json(silent=True)
+    url = (data or {}).get('url', '').strip()
+    if not url:
+        return jsonify({
+            'success': False,
+            'error': 'URL is required in JSON body'
+        }), 400
+    
+    job = ScrapeJob.enqueue('add_product', url=url)
+    db.session.commit()
+    return queued_job_response(job)
+
+
+@app.route('/jobs/rescrape/<int:product_id>', methods=['POST'])
+def enqueue_rescrape(product_id):
+    """Queue a re-scrape of one product for the workers"""
+    product = Product.query.get_or_404(product_id)
+    job = ScrapeJob.enqueue('rescrape', product_id=product.id)
+    db.session.commit()
+    return queued_job_response(job)
+
+
+@app.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status (queued/running/done/failed) and result of a scrape job"""
+    job = ScrapeJob.query.get_or_404(job_id)
+    return jsonify(dict(job.to_dict(), success=True))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Scrape counters and stage timings in the Prometheus text format (this process only)"""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.cli.command('rescrape-all')
+@click.option('--after-id', type=int, default=0,
+              help='Resume an interrupted run after the last committed product id')
+def rescrape_all_command(after_id):
+    """Re-scrape every product now, ignoring their schedules"""
+    auto_rescrape_all(after_id)
+
+
+@app.cli.command('backfill-price-stats')
+def backfill_price_stats():
+    """Recompute the denormalized price columns from price_history"""
+    summaries = Product.price_summary_query().all()
+    if not summaries:
+        print("Nothing to backfill")
+        return
+    checks = dict(db.session.query(Product.id, Product.check_count))
+    
+    db.session.execute(
+        db.update(Product),
+        [{
+            'id': row.product_id,
+            'current_price': row.latest_price,
+            'previous_price': row.previous_price,
+            'history_count': row.history_count,
+            'change_count': row.change_count,
+            # Not-modified checks left no history; keep any counted since
+            'check_count': max(row.history_count, checks.get(row.product_id, 0)),
+            'min_price': row.min_price,
+            'max_price': row.max_price,
+            'last_scraped_at': row.last_scraped_at
+        } for row in summaries]
+    )
+    db.session.commit()
+    print(f"✅ Backfilled price stats for {len(summaries)} products")
+
+
+@app.cli.command('compact-price-history')
+def compact_price_history():
+    """Collapse runs of unchanged prices into run-length rows ('changes' mode)"""
+    product_ids = [product_id for (product_id,) in db.session.query(Product.id)]
+    removed = 0
+    
+    for product_id in product_ids:
+        run = None
+        duplicate_ids = []
+        
+        history = PriceHistory.query.filter_by(product_id=product_id) \
+            .order_by(PriceHistory.scraped_at, PriceHistory.id).yield_per(1000)
+        for h in history:
+            if run is not None and h.price == run.price:
+                run.sample_count = (run.sample_count or 1) + (h.sample_count or 1)
+                run.last_confirmed_at = h.last_confirmed_at or h.scraped_at
+                duplicate_ids.append(h.id)
+            else:
+                run = h
+        
+        for start in range(0, len(duplicate_ids), 500):
+            PriceHistory.query.filter(PriceHistory.id.in_(duplicate_ids[start:start + 500])) \
+                .delete(synchronize_session=False)
+        db.session.commit()
+        removed += len(duplicate_ids)
+    
+    print(f"✅ Compacted price history: removed {removed} unchanged rows")
+
+
+@app.cli.command('import-products')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'lines']),
+              help='Input format (default: guessed from the file name)')
+def import_products_command(source, fmt):
+    """Bulk-add product URLs from a CSV / JSONL / one-per-line file ('-' for stdin)"""
+    from utils.bulk_import import detect_format, iter_urls, clean_urls
+    
+    urls, invalid = clean_urls(iter_urls(source.read(), fmt or detect_format(source.name)))
+    for url in invalid:
+        print(f"⚠️ Skipping invalid URL: {url[:80]}")
+    
+    created = import_products(urls) if urls else {}
+    print(f"📥 {len(created)} new products, {len(urls) - len(created)} already tracked")
+    
+    stats = {'updated': 0, 'unchanged': 0, 'failed': 0}
+    for done, (product_id, outcome, _) in enumerate(iter_rescrape(list(created)), 1):
+        stats[outcome] += 1
+        print(f"[{done}/{len(created)}] #{product_id} {outcome}")
+    
+    print(f"✅ Import complete! ({stats['updated']} scraped, {stats['failed']} failed)")
+
+
 if __name__ == '__main__':
+    # Only the server starts the scheduler - not flask CLI commands or other importers
+    if app.config['SCHEDULER_ENABLED']:
+        start_scheduler()
+    start_view_flusher()
+    
     port = int(os.environ.get("PORT", 5000))
     # host='0.0.0.0' is REQUIRED for Railway
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
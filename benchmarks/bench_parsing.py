@@ -0,0 +1,76 @@
+"""
+Parse time per site: the old full html.parser path vs the current parsers.
+
+    python -m benchmarks.bench_parsing [--size-kb 1500] [--repeat 5]
+
+"before" rebuilds what the parsers used to do: a full html.parser tree,
+a find_all over every ld+json script and a regex over str(bytes).
+"after" is the site's real adapter from utils/sites.py.
+"""
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import build_page, fixture_url
+from utils.html_parsing import PARSER
+from utils.sites import get_adapter
+
+SITES = ['walmart', 'bestbuy', 'newegg', 'aliexpress', 'generic']
+
+
+def legacy_parse(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    soup.find('h1')
+    soup.find('meta', {'property': 'og:title'})
+    soup.find_all('script', {'type': 'application/ld+json'})
+    re.findall(r'"price"[:\s]+"?([\d,]+\.?\d{0,2})"?', str(html_content))
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-kb', type=int, default=1500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Parser backend: {PARSER}")
+    print(f"{'site':<10}{'page KB':>10}{'before ms':>12}{'after ms':>12}{'speedup':>10}  result")
+
+    # Parsers print progress (and may save debug captures under the cwd) - keep both out of the way
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for site in SITES:
+                page = build_page(site, size_kb=args.size_kb)
+                url = fixture_url(site, 1)
+                parse = get_adapter(url).parse
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    before = best_time(lambda: legacy_parse(page), args.repeat)
+                    after = best_time(lambda: parse(page, url), args.repeat)
+                    result = parse(page, url)
+
+                outcome = f"${result['price']}" if result['success'] else f"FAILED: {result['error']}"
+                print(f"{site:<10}{len(page) // 1024:>10}{before * 1000:>12.1f}{after * 1000:>12.1f}"
+                      f"{before / after:>9.1f}x  {outcome}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    main()
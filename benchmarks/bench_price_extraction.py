@@ -0,0 +1,117 @@
+"""
+Price extraction micro-benchmarks over synthetic fixture pages.
+
+    python -m benchmarks.bench_price_extraction [--repeat 5] [--check]
+
+--check exits non-zero if any known price string parses wrong or the
+byte scanner is slower than the legacy decode-and-findall path, so it
+can gate CI or a pre-push hook.
+"""
+import argparse
+import re
+import sys
+import time
+
+from benchmarks.fixtures import build_page
+from utils.price_extraction import extract_price, scan_prices
+
+# text -> expected price
+KNOWN_PRICES = {
+    '$1,234.56': 1234.56,
+    'US $69.42': 69.42,
+    '1.234,56 €': 1234.56,
+    '1 234,56 €': 1234.56,
+    '12,50': 12.5,
+    '£7.99': 7.99,
+    "CHF 1'299.00": 1299.0,
+    '$12.99 $15.99': 12.99,
+    'Now $449.00': 449.0,
+    '449': 449.0,
+    '24.950': 24.95,
+    '69.4200': 69.42,
+    '19.989999': 19.99,
+    '1,234': 1234.0,
+    '1.234,5': 1234.5,
+    'Free': None,
+    '0.00': None,
+}
+
+QUOTED_PRICE = re.compile(rb'"price"[:\s]+"?([\d,]+\.?\d{0,2})"?')
+
+
+def legacy_extract_price(price_text):
+    """extract_price as it was: recompiled search, commas dropped"""
+    if not price_text:
+        return None
+    matches = re.findall(r'[\d,]+\.?\d*', str(price_text).strip())
+    if not matches:
+        return None
+    try:
+        price = float(matches[0].replace(',', ''))
+        if 0.01 <= price <= 999999:
+            return round(price, 2)
+    except ValueError:
+        pass
+    return None
+
+
+def legacy_scan(raw):
+    for match in re.findall(r'"price"[:\s]+"?([\d,]+\.?\d{0,2})"?', str(raw)):
+        price = legacy_extract_price(match)
+        if price and 0.99 <= price <= 50000:
+            return price
+    return None
+
+
+def best_time(func, repeat, loops=1):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - started) / loops)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--size-kb', type=int, default=1500)
+    parser.add_argument('--check', action='store_true')
+    args = parser.parse_args()
+    failures = []
+
+    for text, expected in KNOWN_PRICES.items():
+        got = extract_price(text)
+        if got != expected:
+            failures.append(f'extract_price({text!r}) = {got}, expected {expected}')
+
+    texts = list(KNOWN_PRICES) * 100
+    before = best_time(lambda: [legacy_extract_price(t) for t in texts], args.repeat) / len(texts)
+    after = best_time(lambda: [extract_price(t) for t in texts], args.repeat) / len(texts)
+    print(f"extract_price: legacy {before * 1e6:.2f} µs/call, current {after * 1e6:.2f} µs/call")
+
+    print(f"{'page':<22}{'KB':>8}{'legacy ms':>12}{'scan ms':>10}{'speedup':>10}  price")
+    pages = {site: build_page(site, size_kb=args.size_kb) for site in ('walmart', 'bestbuy', 'generic')}
+    # A page without any "price" key exercises the early exit
+    pages['generic (no match)'] = pages.pop('generic')
+
+    for name, raw in pages.items():
+        before = best_time(lambda: legacy_scan(raw), args.repeat)
+        after = best_time(lambda: scan_prices(raw, QUOTED_PRICE, b'"price"', 0.99, 50000), args.repeat)
+        price = scan_prices(raw, QUOTED_PRICE, b'"price"', 0.99, 50000)
+        if price != legacy_scan(raw):
+            failures.append(f'{name}: scan found {price}, legacy found {legacy_scan(raw)}')
+        if after > before:
+            failures.append(f'{name}: scan {after * 1000:.1f} ms slower than legacy {before * 1000:.1f} ms')
+        print(f"{name:<22}{len(raw) // 1024:>8}{before * 1000:>12.2f}{after * 1000:>10.2f}"
+              f"{before / after:>9.1f}x  {price}")
+
+    if failures:
+        print('\n'.join(['', 'FAILED:'] + failures))
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
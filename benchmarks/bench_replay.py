@@ -0,0 +1,185 @@
+"""
+End-to-end scrape throughput against the offline retailer stand-in.
+
+    python -m benchmarks.bench_replay [--mode both] [--products 200] [--concurrency 16]
+        [--latency-ms 100] [--jitter-ms 30] [--error-rate 0.02] [--throttle-rate 0.01]
+
+"scrape" calls scrape_product for every synthetic product from a thread
+pool; "rescrape" loads them into a throwaway SQLite database and times
+auto_rescrape_all. Both go through the real HTTP session, rate limiter,
+adapters and (for rescrape) DB writes - only the retailers are fake, served
+by benchmarks/standin_server.py in its own process via HTTP_PROXY.
+
+Reports pages/sec, p50/p95/p99 scrape latency and peak RSS of this process.
+Rate limits are lifted unless --polite, so the numbers measure our code.
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import fixture_url
+from benchmarks.standin_server import serve
+
+DEFAULT_SITES = 'walmart,bestbuy,newegg,generic'
+
+
+def start_standin(config_kwargs):
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    process = context.Process(target=serve, args=(0, config_kwargs, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=60)
+
+
+def configure_environment(port, workdir, polite):
+    """Must run before anything from utils/ or app is imported - they read env at import"""
+    proxy = f'http://127.0.0.1:{port}'
+    for name in ('HTTP_PROXY', 'http_proxy'):
+        os.environ[name] = proxy
+    for name in ('NO_PROXY', 'no_proxy'):
+        os.environ.pop(name, None)
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    os.environ['SCHEDULER_ENABLED'] = '0'
+    # Keep stand-in routing stats and page captures out of the real ones
+    os.environ['ROUTING_STATS_PATH'] = os.path.join(workdir, 'routing_stats.json')
+    os.environ['DEBUG_CAPTURE_DIR'] = os.path.join(workdir, 'debug_pages')
+    if not polite:
+        os.environ['RATE_LIMIT_DEFAULT_RPS'] = '100000'
+        os.environ['RATE_LIMIT_DEFAULT_BURST'] = '100000'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def report(mode, urls, wall, latencies, ok):
+    latencies = sorted(latencies)
+    return {
+        'mode': mode,
+        'products': len(urls),
+        'ok': ok,
+        'failed': len(urls) - ok,
+        'seconds': round(wall, 2),
+        'pages_per_sec': round(len(urls) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+def run_scrape(urls, concurrency):
+    from utils.scraper import scrape_product
+
+    def timed_scrape(url):
+        started = time.perf_counter()
+        result = scrape_product(url)
+        return result['success'], time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed_scrape, urls))
+    wall = time.perf_counter() - started
+
+    return report('scrape', urls, wall, [seconds for _, seconds in outcomes], sum(ok for ok, _ in outcomes))
+
+
+def run_rescrape(urls, concurrency):
+    from utils import metrics
+    from app import app, auto_rescrape_all, import_products
+
+    app.config['RESCRAPE_MAX_WORKERS'] = concurrency
+    app.config['RESCRAPE_PER_DOMAIN_LIMIT'] = concurrency
+    with app.app_context():
+        import_products(urls)
+
+    # Keep every sample of this run for the percentiles
+    metrics.MAX_SAMPLES = max(metrics.MAX_SAMPLES, len(urls))
+    metrics.reset()
+    started = time.perf_counter()
+    auto_rescrape_all()
+    wall = time.perf_counter() - started
+
+    ok = sum(int(value) for (name, labels), value in metrics.counter_values('scrapes_total')
+             if dict(labels).get('outcome') != 'failure')
+    return report('rescrape', urls, wall, metrics.timing_samples('scrape_duration_seconds'), ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=['scrape', 'rescrape', 'both'], default='both')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--sites', default=DEFAULT_SITES,
+                        help='comma-separated; aliexpress needs Chrome only if its embedded page data misses')
+    parser.add_argument('--size-kb', type=int, default=300)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--pages-dir', help='recorded pages named <site>*.html, served instead of synthetic ones')
+    parser.add_argument('--polite', action='store_true', help='keep the per-domain rate limits')
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args()
+
+    sites = [site.strip() for site in args.sites.split(',') if site.strip()]
+    urls = [fixture_url(sites[i % len(sites)], 1000 + i, scheme='http') for i in range(args.products)]
+
+    standin, port = start_standin({
+        'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate, 'throttle_rate': args.throttle_rate,
+        'size_kb': args.size_kb, 'pages_dir': args.pages_dir
+    })
+
+    results = []
+    # Scrapers print per page (and may save debug captures under the cwd) - keep both out of the way
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(port, workdir, args.polite)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if args.mode in ('scrape', 'both'):
+                    results.append(run_scrape(urls, args.concurrency))
+                if args.mode in ('rescrape', 'both'):
+                    results.append(run_rescrape(urls, args.concurrency))
+        finally:
+            # Flush now: the atexit save would run after the workdir is gone
+            from utils.backend_router import backend_router
+            backend_router.save()
+            os.chdir(cwd)
+            standin.terminate()
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result))
+        return
+
+    print(f"Stand-in: {args.latency_ms:g}±{args.jitter_ms:g} ms, {args.error_rate:.0%} errors, "
+          f"{args.throttle_rate:.0%} 429s, sites: {', '.join(sites)}")
+    print(f"{'mode':<10}{'products':>9}{'failed':>8}{'seconds':>9}{'pages/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}")
+    for r in results:
+        print(f"{r['mode']:<10}{r['products']:>9}{r['failed']:>8}{r['seconds']:>9}{r['pages_per_sec']:>9}"
+              f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['peak_rss_mb']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Synthetic retailer product pages for offline benchmarks.
+
+Each page mimics the parts of the real site our scrapers care about (title,
+price markup, JSON-LD / embedded state) buried in the bulk a real page
+carries: inline scripts, navigation, review lists and tracking pixels.
+"""
+import json
+import random
+
+# site -> (host, title, price) the generated page advertises
+FIXTURE_SITES = {
+    'walmart': ('www.walmart.com', 'Onn 50" 4K UHD Roku Smart TV', 198.00),
+    'bestbuy': ('www.bestbuy.com', 'Sony WH-1000XM5 Wireless Headphones', 329.99),
+    'newegg': ('www.newegg.com', 'AMD Ryzen 7 7800X3D Desktop Processor', 449.00),
+    'aliexpress': ('www.aliexpress.com', 'Mini Portable Projector 4K Android WiFi', 69.42),
+    'generic': ('shop.example.com', 'Stainless Steel Water Bottle 32oz', 24.95),
+}
+
+PRODUCT_PATHS = {
+    'walmart': '/ip/{id}',
+    'bestbuy': '/site/product/{id}.p',
+    'newegg': '/p/N82E{id}',
+    'aliexpress': '/item/{id}.html',
+    'generic': '/products/{id}',
+}
+
+
+def fixture_url(site, product_id, scheme='https'):
+    host = FIXTURE_SITES[site][0]
+    return f"{scheme}://{host}{PRODUCT_PATHS[site].format(id=product_id)}"
+
+
+def _filler(rng, size_bytes):
+    """Navigation, reviews, inline JS and pixels - the stuff parsers wade through"""
+    chunks = []
+    total = 0
+    n = 0
+    while total < size_bytes:
+        n += 1
+        kind = n % 4
+        if kind == 0:
+            chunk = '<nav><ul>' + ''.join(
+                f'<li class="nav-item"><a href="/browse/{rng.randint(1, 99999)}">Category {i}</a></li>'
+                for i in range(20)
+            ) + '</ul></nav>'
+        elif kind == 1:
+            chunk = '<div class="review"><div class="stars" aria-label="4 out of 5 stars"></div>' \
+                    f'<p>{"Great value, works as described. " * rng.randint(3, 12)}</p>' \
+                    f'<span class="review-date">2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}</span></div>'
+        elif kind == 2:
+            blob = {'module': n, 'items': [{'sku': rng.randint(1, 10 ** 8), 'rank': i} for i in range(25)]}
+            chunk = f'<script>window.__analytics_{n} = {json.dumps(blob)};</script>'
+        else:
+            chunk = f'<img src="https://cdn.example.net/p/{rng.randint(1, 10 ** 9)}.jpg" width="1" height="1" alt="">'
+        chunks.append(chunk)
+        total += len(chunk)
+    return ''.join(chunks)
+
+
+def _product_markup(site, title, price):
+    dollars, cents = f"{price:.2f}".split('.')
+    json_ld = json.dumps({
+        '@context': 'https://schema.org',
+        '@type': 'Product',
+        'name': title,
+        'offers': {'@type': 'Offer', 'price': f"{price:.2f}", 'priceCurrency': 'USD'}
+    })
+
+    if site == 'walmart':
+        state = {'props': {'pageProps': {'initialData': {'data': {'product': {
+            'name': title, 'priceInfo': {'currentPrice': {'price': price, 'priceString': f"${price:.2f}"}}
+        }}}}}}
+        return (
+            f'<h1 itemprop="name">{title}</h1>'
+            f'<span itemprop="price" content="{price:.2f}">${price:.2f}</span>'
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(state)}</script>'
+        )
+    if site == 'bestbuy':
+        return (
+            f'<h1 class="heading-5 v-fw-regular">{title}</h1>'
+            f'<div class="priceView-hero-price priceView-customer-price"><span aria-hidden="true">${price:.2f}</span></div>'
+            f'<script type="application/ld+json">{json_ld}</script>'
+        )
+    if site == 'newegg':
+        return (
+            f'<h1 class="product-title">{title}</h1>'
+            f'<ul class="price"><li class="price-current">$<strong>{dollars}</strong><sup>.{cents}</sup></li></ul>'
+            f'<script type="application/ld+json">{json_ld}</script>'
+        )
+    if site == 'aliexpress':
+        run_params = {'data': {'priceModule': {
+            'minActivityAmount': {'value': price, 'currency': 'USD'},
+            'minAmount': {'value': round(price * 2.6, 2), 'currency': 'USD'}
+        }, 'titleModule': {'subject': title}}}
+        return (
+            f'<h1 data-pl="product-title">{title}</h1>'
+            f'<div class="product-price-current"><span class="product-price-value">US ${price:.2f}</span></div>'
+            f'<script>window.runParams = {json.dumps(run_params)};\nvar csrfToken = "x";</script>'
+        )
+    return f'<h1>{title}</h1><span class="price">${price:.2f}</span>'
+
+
+def build_page(site, size_kb=1500, seed=0, price=None):
+    """A ~size_kb product page for `site`, deterministic for a given seed"""
+    host, title, default_price = FIXTURE_SITES[site]
+    price = default_price if price is None else price
+    rng = random.Random(f"{site}-{seed}")
+    half = size_kb * 1024 // 2
+
+    html = (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        f'<title>{title} - {host}</title>'
+        f'<meta property="og:title" content="{title}">'
+        f'<script>{"var config = {};" * 200}</script>'
+        '</head><body>'
+        f'{_filler(rng, half)}'
+        f'<main class="product">{_product_markup(site, title, price)}</main>'
+        f'{_filler(rng, half)}'
+        '</body></html>'
+    )
+    return html.encode('utf-8')
@@ -0,0 +1,167 @@
+"""
+Local stand-in for the retailers, so scrapers can be benchmarked offline.
+
+    python -m benchmarks.standin_server --port 8899 --latency-ms 120 --jitter-ms 40
+
+It's an HTTP proxy: point HTTP_PROXY at it and request plain-http fixture
+URLs (fixture_url(site, id, scheme='http')). The Host header picks the
+site, the product id picks the page variant and price. Pages come from
+--pages-dir (recorded pages named <site>*.html) or from build_page().
+
+Latency, jitter, 5xx errors and 429s (with Retry-After) are injected per
+request, so rate limiting, retries and slow sites can all be exercised.
+"""
+import argparse
+import glob
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import FIXTURE_SITES, build_page
+
+HOST_TO_SITE = {host: site for site, (host, _, _) in FIXTURE_SITES.items()}
+PRODUCT_ID = re.compile(r'(\d+)')
+
+
+class StandinConfig:
+    def __init__(self, latency_ms=100, jitter_ms=30, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, size_kb=300, variants=8, pages_dir=None, etags=False, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.size_kb = size_kb
+        self.variants = max(1, variants)
+        self.pages_dir = pages_dir
+        self.etags = etags
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self._pages = {}
+        self._pages_lock = threading.Lock()
+        self._recorded = self._load_recorded(pages_dir)
+
+    @staticmethod
+    def _load_recorded(pages_dir):
+        recorded = {}
+        if not pages_dir:
+            return recorded
+        for site in FIXTURE_SITES:
+            paths = sorted(glob.glob(os.path.join(pages_dir, f'{site}*.html')))
+            pages = []
+            for path in paths:
+                with open(path, 'rb') as f:
+                    pages.append(f.read())
+            if pages:
+                recorded[site] = pages
+        return recorded
+
+    def roll(self):
+        with self.rng_lock:
+            return self.rng.random(), self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+
+    def page(self, site, product_id):
+        """Body for a product: recorded page if we have one, else a synthetic variant"""
+        if site in self._recorded:
+            pages = self._recorded[site]
+            return pages[product_id % len(pages)]
+
+        variant = product_id % self.variants
+        key = (site, variant)
+        page = self._pages.get(key)
+        if page is None:
+            with self._pages_lock:
+                page = self._pages.get(key)
+                if page is None:
+                    default_price = FIXTURE_SITES[site][2]
+                    page = build_page(site, size_kb=self.size_kb, seed=variant,
+                                      price=round(default_price * (1 + variant / 100), 2))
+                    self._pages[key] = page
+        return page
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.config
+        chance, jitter = config.roll()
+        time.sleep(max(0.0, (config.latency_ms + jitter) / 1000))
+
+        parts = urlsplit(self.path)
+        host = (parts.hostname or self.headers.get('Host', '')).split(':')[0].lower()
+        site = HOST_TO_SITE.get(host)
+        match = PRODUCT_ID.search(parts.path if parts.scheme else self.path)
+        if site is None or match is None:
+            return self._reply(404, b'not found')
+
+        if chance < config.throttle_rate:
+            return self._reply(429, b'Too Many Requests', {'Retry-After': str(config.retry_after)})
+        if chance < config.throttle_rate + config.error_rate / 2:
+            return self._reply(503, b'Service Unavailable', {'Retry-After': str(config.retry_after)})
+        if chance < config.throttle_rate + config.error_rate:
+            return self._reply(500, b'Server error')
+
+        body = config.page(site, int(match.group(1)))
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        if config.etags:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                return self._reply(304, b'', {'ETag': etag})
+            headers['ETag'] = etag
+        self._reply(200, body, headers)
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(config, port=0, host='127.0.0.1'):
+    handler = type('Handler', (StandinHandler,), {'config': config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(port, config_kwargs, ready=None):
+    """Process entry point: serve forever, reporting the bound port through `ready`"""
+    server = make_server(StandinConfig(**config_kwargs), port)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline retailer stand-in (HTTP proxy)')
+    parser.add_argument('--port', type=int, default=8899)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--size-kb', type=int, default=300)
+    parser.add_argument('--pages-dir')
+    parser.add_argument('--etags', action='store_true')
+    args = parser.parse_args()
+
+    config = StandinConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                           size_kb=args.size_kb, pages_dir=args.pages_dir, etags=args.etags)
+    print(f"🏪 Stand-in retailers on http://127.0.0.1:{args.port} (use it as HTTP_PROXY)")
+    make_server(config, args.port).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,4 +11,36 @@ class Config:
     if SQLALCHEMY_DATABASE_URI and SQLALCHEMY_DATABASE_URI.startswith("postgres://"):
         SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI.replace("postgres://", "postgresql://", 1)
         
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Re-scrape engine: total concurrent scrapes, and per retailer domain
+    RESCRAPE_MAX_WORKERS = int(os.environ.get('RESCRAPE_MAX_WORKERS', 16))
+    RESCRAPE_PER_DOMAIN_LIMIT = int(os.environ.get('RESCRAPE_PER_DOMAIN_LIMIT', 4))
+    # Products scraped and committed together; bounds memory and lost work on a crash
+    RESCRAPE_CHUNK_SIZE = int(os.environ.get('RESCRAPE_CHUNK_SIZE', 200))
+
+    # 'full' stores a history row per scrape, 'changes' only when the price moves
+    # (unchanged scrapes extend the latest row's sample_count / last_confirmed_at)
+    PRICE_HISTORY_MODE = os.environ.get('PRICE_HISTORY_MODE', 'full')
+
+    # Adaptive scheduling: each product gets its own next-due time between
+    # the min and max interval; the dispatcher checks for due products every tick
+    SCHEDULE_MIN_INTERVAL_MINUTES = int(os.environ.get('SCHEDULE_MIN_INTERVAL_MINUTES', 60))
+    SCHEDULE_BASE_INTERVAL_MINUTES = int(os.environ.get('SCHEDULE_BASE_INTERVAL_MINUTES', 1440))
+    SCHEDULE_MAX_INTERVAL_MINUTES = int(os.environ.get('SCHEDULE_MAX_INTERVAL_MINUTES', 4320))
+    SCHEDULER_TICK_MINUTES = int(os.environ.get('SCHEDULER_TICK_MINUTES', 5))
+    SCHEDULER_BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', 500))
+    # History views are buffered in memory and added to view_count this often
+    VIEW_FLUSH_SECONDS = int(os.environ.get('VIEW_FLUSH_SECONDS', 60))
+
+    # Scrape job queue (see worker.py). The due-product dispatcher runs in the
+    # web server (python app.py), never in flask CLI commands; with
+    # SCHEDULER_ENABLED=0 it doesn't either - start one worker with --scheduler.
+    # DISPATCH_TO_WORKERS=1 makes the dispatcher enqueue jobs for all workers
+    # instead of scraping in its own process.
+    SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    DISPATCH_TO_WORKERS = os.environ.get('DISPATCH_TO_WORKERS', '0') == '1'
+    JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE', 50))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_TIMEOUT_MINUTES = int(os.environ.get('JOB_TIMEOUT_MINUTES', 30))
+    JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 1.0))
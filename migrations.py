@@ -0,0 +1,61 @@
+from sqlalchemy import inspect, text
+
+# db.create_all() only creates missing tables, so columns added to existing
+# tables are listed here and applied with ALTER TABLE on startup.
+ADDED_COLUMNS = {
+    'products': [
+        ('previous_price', 'FLOAT'),
+        ('last_scraped_at', 'TIMESTAMP'),
+        ('history_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('min_price', 'FLOAT'),
+        ('max_price', 'FLOAT'),
+        ('etag', 'VARCHAR(255)'),
+        ('last_modified', 'VARCHAR(64)'),
+        ('content_hash', 'VARCHAR(64)'),
+        ('next_scrape_at', 'TIMESTAMP'),
+        ('change_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('check_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('view_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('consecutive_failures', 'INTEGER NOT NULL DEFAULT 0'),
+        ('last_failure_at', 'TIMESTAMP'),
+    ],
+    'price_history': [
+        ('last_confirmed_at', 'TIMESTAMP'),
+        ('sample_count', 'INTEGER NOT NULL DEFAULT 1'),
+    ],
+}
+
+# Same idea for indexes declared on models after their table already existed
+ADDED_INDEXES = {
+    'products': [
+        ('ix_products_next_scrape_at', '(next_scrape_at)'),
+    ],
+    'price_history': [
+        ('ix_price_history_product_scraped', '(product_id, scraped_at)'),
+    ],
+}
+
+
+def run_migrations(db):
+    """Add any missing columns and indexes. Safe to run on every boot."""
+    inspector = inspect(db.engine)
+    applied = []
+
+    with db.engine.begin() as conn:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {c['name'] for c in inspector.get_columns(table)}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+                    applied.append(f'{table}.{name}')
+
+        for table, indexes in ADDED_INDEXES.items():
+            existing = {i['name'] for i in inspector.get_indexes(table)}
+            for name, columns in indexes:
+                if name not in existing:
+                    conn.execute(text(f'CREATE INDEX {name} ON {table} {columns}'))
+                    applied.append(name)
+
+    if applied:
+        print(f"🛠️ Migrated: {', '.join(applied)}")
+    return applied
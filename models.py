@@ -1,5 +1,10 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import func, case, and_
+from datetime import datetime, timedelta
+import csv
+import io
+import json
 
 db = SQLAlchemy()
 
@@ -12,21 +17,141 @@ class Product(db.Model):
     current_price = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Maintained by record_price() so trend reads never touch price_history
+    previous_price = db.Column(db.Float, nullable=True)
+    last_scraped_at = db.Column(db.DateTime, nullable=True)
+    history_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    min_price = db.Column(db.Float, nullable=True)
+    max_price = db.Column(db.Float, nullable=True)
+    
+    # Conditional-fetch validators from the last successful scrape
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(64), nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)
+    
+    # Adaptive scheduling: when to scrape next, and what drives that choice
+    next_scrape_at = db.Column(db.DateTime, nullable=True, index=True)
+    change_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Successful checks, including not-modified ones that store no price
+    check_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_failure_at = db.Column(db.DateTime, nullable=True)
+    
     # Relationship: One product has many price history records
     price_history = db.relationship('PriceHistory', backref='product', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Product {self.title}>'
     
+    def record_price(self, price, scraped_at=None, history_rows=None, latest_rows=None):
+        """
+        Add a PriceHistory row and update the denormalized price fields in
+        the same session, so both land in the same commit.
+        
+        With PRICE_HISTORY_MODE='changes' an unchanged price extends the
+        latest row's run (sample_count / last_confirmed_at) instead of
+        inserting a new one.
+        
+        Batch callers pass a `history_rows` list: new rows are appended to
+        it as plain dicts for PriceHistory.bulk_insert() instead of being
+        added to the session one object at a time, and `latest_rows` from
+        PriceHistory.latest_for() so runs are extended without a query each.
+        """
+        scraped_at = scraped_at or datetime.utcnow()
+        
+        history = None
+        if (current_app.config.get('PRICE_HISTORY_MODE') == 'changes'
+                and self.history_count and self.current_price == price):
+            if latest_rows is not None:
+                history = latest_rows.get(self.id)
+            else:
+                history = self.latest_history()
+            if history is not None and history.price == price:
+                history.last_confirmed_at = scraped_at
+                history.sample_count = (history.sample_count or 1) + 1
+            else:
+                history = None
+        
+        if self.history_count:
+            self.previous_price = self.current_price
+            if self.current_price != price:
+                self.change_count = (self.change_count or 0) + 1
+        self.current_price = price
+        self.record_check()
+        self.last_scraped_at = scraped_at
+        self.history_count = (self.history_count or 0) + 1
+        self.min_price = price if self.min_price is None else min(self.min_price, price)
+        self.max_price = price if self.max_price is None else max(self.max_price, price)
+        
+        if history is None and history_rows is not None:
+            history = {'product_id': self.id, 'price': price, 'scraped_at': scraped_at, 'sample_count': 1}
+            history_rows.append(history)
+        elif history is None:
+            history = PriceHistory(product_id=self.id, price=price, scraped_at=scraped_at)
+            db.session.add(history)
+        return history
+    
+    def record_check(self):
+        """Count a successful scrape, whether or not it stored a price"""
+        # Products from before check_count existed start from their history
+        self.check_count = max(self.check_count or 0, self.history_count or 0) + 1
+        self.consecutive_failures = 0
+    
+    def record_failure(self, failed_at=None):
+        self.consecutive_failures = (self.consecutive_failures or 0) + 1
+        self.last_failure_at = failed_at or datetime.utcnow()
+    
+    def schedule_next(self, now=None):
+        """Pick next_scrape_at from volatility, popularity and failures"""
+        from utils.scheduling import compute_interval, next_due_at
+        
+        config = current_app.config
+        interval = compute_interval(
+            self.check_count,
+            self.change_count,
+            self.view_count,
+            self.consecutive_failures,
+            min_minutes=config['SCHEDULE_MIN_INTERVAL_MINUTES'],
+            base_minutes=config['SCHEDULE_BASE_INTERVAL_MINUTES'],
+            max_minutes=config['SCHEDULE_MAX_INTERVAL_MINUTES']
+        )
+        self.next_scrape_at = next_due_at(interval, now)
+        return self.next_scrape_at
+    
+    def latest_history(self):
+        """Newest PriceHistory row (one index lookup, not the whole relationship)"""
+        return PriceHistory.query.filter_by(product_id=self.id) \
+            .order_by(PriceHistory.scraped_at.desc(), PriceHistory.id.desc()).first()
+    
+    def get_validators(self):
+        """What scrape_product needs to send a conditional request"""
+        return {
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'content_hash': self.content_hash
+        }
+    
+    def set_validators(self, validators):
+        validators = validators or {}
+        self.etag = validators.get('etag')
+        self.last_modified = validators.get('last_modified')
+        self.content_hash = validators.get('content_hash')
+    
     def get_price_trend(self):
         """Returns 'up', 'down', or 'same' based on last 2 prices"""
-        if len(self.price_history) < 2:
+        return Product.trend_between(self.current_price, self.previous_price)
+    
+    def get_price_change_percent(self):
+        """Returns percentage change"""
+        return Product.change_percent_between(self.current_price, self.previous_price)
+    
+    @staticmethod
+    def trend_between(latest, previous):
+        """'up', 'down', or 'same' going from previous to latest price"""
+        if latest is None or previous is None:
             return 'same'
         
-        sorted_history = sorted(self.price_history, key=lambda x: x.scraped_at, reverse=True)
-        latest = sorted_history[0].price
-        previous = sorted_history[1].price
-        
         if latest < previous:
             return 'down'
         elif latest > previous:
@@ -34,28 +159,253 @@ class Product(db.Model):
         else:
             return 'same'
     
-    def get_price_change_percent(self):
-        """Returns percentage change"""
-        if len(self.price_history) < 2:
-            return 0
-        
-        sorted_history = sorted(self.price_history, key=lambda x: x.scraped_at, reverse=True)
-        latest = sorted_history[0].price
-        previous = sorted_history[1].price
-        
-        if previous == 0:
+    @staticmethod
+    def change_percent_between(latest, previous):
+        """Percentage change from previous to latest price"""
+        if latest is None or previous is None or previous == 0:
             return 0
         
         return round(((latest - previous) / previous) * 100, 1)
+    
+    @staticmethod
+    def price_summary_query():
+        """
+        Per-product history aggregates computed in the database: latest and
+        previous price, count, price changes, min, max and last scrape time. Window
+        functions rank each product's history so nothing is sorted in Python.
+        Used to backfill the denormalized columns.
+        """
+        ranked = db.session.query(
+            PriceHistory.product_id.label('product_id'),
+            PriceHistory.price.label('price'),
+            func.coalesce(PriceHistory.last_confirmed_at, PriceHistory.scraped_at).label('seen_at'),
+            func.coalesce(PriceHistory.sample_count, 1).label('samples'),
+            func.lag(PriceHistory.price).over(
+                partition_by=PriceHistory.product_id,
+                order_by=(PriceHistory.scraped_at, PriceHistory.id)
+            ).label('earlier_price'),
+            func.row_number().over(
+                partition_by=PriceHistory.product_id,
+                order_by=(PriceHistory.scraped_at.desc(), PriceHistory.id.desc())
+            ).label('rn')
+        ).subquery()
+        
+        return db.session.query(
+            ranked.c.product_id,
+            func.max(case((ranked.c.rn == 1, ranked.c.price))).label('latest_price'),
+            # A run of 2+ samples means the previous scrape saw the same price
+            func.coalesce(
+                func.max(case((and_(ranked.c.rn == 1, ranked.c.samples > 1), ranked.c.price))),
+                func.max(case((ranked.c.rn == 2, ranked.c.price)))
+            ).label('previous_price'),
+            func.sum(ranked.c.samples).label('history_count'),
+            func.sum(case((ranked.c.earlier_price != ranked.c.price, 1), else_=0)).label('change_count'),
+            func.min(ranked.c.price).label('min_price'),
+            func.max(ranked.c.price).label('max_price'),
+            func.max(ranked.c.seen_at).label('last_scraped_at')
+        ).group_by(ranked.c.product_id)
 
 
 class PriceHistory(db.Model):
     __tablename__ = 'price_history'
+    __table_args__ = (
+        # Serves "history of product X, newest first" as an index range scan
+        db.Index('ix_price_history_product_scraped', 'product_id', 'scraped_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     price = db.Column(db.Float, nullable=False)
     scraped_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Run-length fields for PRICE_HISTORY_MODE='changes': this row stands for
+    # sample_count scrapes at this price, the last one at last_confirmed_at
+    last_confirmed_at = db.Column(db.DateTime, nullable=True)
+    sample_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    # bucket name -> (Postgres date_trunc unit, SQLite strftime format)
+    BUCKETS = {
+        '1h': ('hour', '%Y-%m-%dT%H:00:00'),
+        '1d': ('day', '%Y-%m-%dT00:00:00'),
+    }
+    
     def __repr__(self):
-        return f'<PriceHistory {self.price} at {self.scraped_at}>'
\ No newline at end of file
+        return f'<PriceHistory {self.price} at {self.scraped_at}>'
+    
+    @staticmethod
+    def bulk_insert(rows):
+        """
+        Insert history rows (dicts from record_price) in the session's
+        transaction: COPY on Postgres with psycopg2, one executemany
+        elsewhere. No ORM objects are built either way.
+        """
+        if not rows:
+            return
+        
+        if db.engine.dialect.driver == 'psycopg2':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([row['product_id'], row['price'], row['scraped_at'].isoformat(), row['sample_count']])
+            buffer.seek(0)
+            
+            cursor = db.session.connection().connection.cursor()
+            cursor.copy_expert(
+                'COPY price_history (product_id, price, scraped_at, sample_count) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.close()
+        else:
+            db.session.execute(db.insert(PriceHistory), rows)
+    
+    @staticmethod
+    def latest_for(product_ids):
+        """Newest row per product -> {product_id: PriceHistory}, in one query"""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        
+        newest = func.row_number().over(
+            partition_by=PriceHistory.product_id,
+            order_by=(PriceHistory.scraped_at.desc(), PriceHistory.id.desc())
+        ).label('newest')
+        ranked = db.session.query(PriceHistory.id, newest) \
+            .filter(PriceHistory.product_id.in_(product_ids)).subquery()
+        rows = PriceHistory.query.join(ranked, PriceHistory.id == ranked.c.id).filter(ranked.c.newest == 1)
+        return {row.product_id: row for row in rows}
+    
+    @staticmethod
+    def bucket_expression(bucket, column=None):
+        """SQL expression truncating scraped_at (or `column`) to the start of its bucket"""
+        column = PriceHistory.scraped_at if column is None else column
+        unit, sqlite_format = PriceHistory.BUCKETS[bucket]
+        if db.engine.dialect.name == 'sqlite':
+            return func.strftime(sqlite_format, column)
+        return func.date_trunc(unit, column)
+    
+    @staticmethod
+    def bucket_start(bucket, moment):
+        """Python twin of bucket_expression() for one datetime"""
+        moment = moment.replace(minute=0, second=0, microsecond=0)
+        return moment.replace(hour=0) if bucket == '1d' else moment
+
+
+class ScrapeJob(db.Model):
+    """
+    Durable work queue for scrapes, so they run in worker processes
+    (worker.py) instead of web requests. Workers claim jobs with a
+    conditional UPDATE, so any number of them can share one table.
+    """
+    __tablename__ = 'scrape_jobs'
+    __table_args__ = (
+        # Serves "oldest queued job that's ready to run"
+        db.Index('ix_scrape_jobs_status_run_after', 'status', 'run_after'),
+    )
+    
+    STATUSES = ('queued', 'running', 'done', 'failed')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ScrapeJob {self.id} {self.kind} {self.status}>'
+    
+    @staticmethod
+    def enqueue(kind, **payload):
+        """Add a job to the session; the caller commits"""
+        job = ScrapeJob(kind=kind, payload=json.dumps(payload), status='queued',
+                        created_at=datetime.utcnow(), run_after=datetime.utcnow())
+        db.session.add(job)
+        return job
+    
+    @staticmethod
+    def claim_next(worker):
+        """
+        Atomically take the oldest ready job, or None. On Postgres the
+        candidate row is locked with SKIP LOCKED so workers don't queue up
+        behind each other; the status check in the UPDATE makes the claim
+        safe everywhere else.
+        """
+        for _ in range(5):
+            now = datetime.utcnow()
+            candidate = db.session.query(ScrapeJob.id) \
+                .filter(ScrapeJob.status == 'queued', ScrapeJob.run_after <= now) \
+                .order_by(ScrapeJob.run_after, ScrapeJob.id) \
+                .limit(1).with_for_update(skip_locked=True).scalar()
+            if candidate is None:
+                db.session.commit()
+                return None
+            
+            claimed = db.session.execute(
+                db.update(ScrapeJob)
+                .where(ScrapeJob.id == candidate, ScrapeJob.status == 'queued')
+                .values(status='running', worker=worker, started_at=now,
+                        attempts=ScrapeJob.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(ScrapeJob, candidate)
+        return None
+    
+    @staticmethod
+    def requeue_stale(timeout_minutes, max_attempts):
+        """Jobs whose worker died mid-run go back to the queue (or fail for good)"""
+        cutoff = datetime.utcnow() - timedelta(minutes=timeout_minutes)
+        stale = and_(ScrapeJob.status == 'running', ScrapeJob.started_at < cutoff)
+        
+        failed = db.session.execute(
+            db.update(ScrapeJob)
+            .where(stale, ScrapeJob.attempts >= max_attempts)
+            .values(status='failed', error='Worker timed out', finished_at=datetime.utcnow())
+        ).rowcount
+        requeued = db.session.execute(
+            db.update(ScrapeJob)
+            .where(stale)
+            .values(status='queued', worker=None, run_after=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        return requeued, failed
+    
+    def get_payload(self):
+        return json.loads(self.payload or '{}')
+    
+    def finish(self, result):
+        self.status = 'done'
+        self.result = json.dumps(result)
+        self.error = None
+        self.finished_at = datetime.utcnow()
+    
+    def fail(self, error, retry_in_seconds=None):
+        """Record an error; with retry_in_seconds the job is queued again instead"""
+        self.error = error
+        if retry_in_seconds is not None:
+            self.status = 'queued'
+            self.worker = None
+            self.run_after = datetime.utcnow() + timedelta(seconds=retry_in_seconds)
+        else:
+            self.status = 'failed'
+            self.finished_at = datetime.utcnow()
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'payload': self.get_payload(),
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
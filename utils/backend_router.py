@@ -0,0 +1,172 @@
+import atexit
+import json
+import os
+import random
+import threading
+import time
+
+from utils.rescrape import get_domain
+
+# Where the learned per-domain backend stats live between restarts
+ROUTING_STATS_PATH = os.environ.get('ROUTING_STATS_PATH', 'routing_stats.json')
+# Write them at most this often (and at exit)
+ROUTING_SAVE_SECONDS = float(os.environ.get('ROUTING_SAVE_SECONDS', 60))
+# Share of scrapes that run the full requests -> Selenium ladder whatever the
+# stats say, so a domain that changed gets noticed
+ROUTING_EXPLORE_RATE = float(os.environ.get('ROUTING_EXPLORE_RATE', 0.05))
+# A Chrome second costs this many requests seconds (CPU, memory, pool slots)
+SELENIUM_COST_FACTOR = float(os.environ.get('SELENIUM_COST_FACTOR', 4.0))
+
+# Cheapest first: a failed scrape escalates down this list
+BACKENDS = ('requests', 'selenium')
+PLANS = (('requests', 'selenium'), ('requests',), ('selenium',))
+
+# Old observations fade: each new one scales the counts down by this, so
+# roughly the last 1 / (1 - DECAY) scrapes of a domain decide its route
+DECAY = 0.98
+LATENCY_SMOOTHING = 0.2
+# Plans that find prices less often than the best one by more than this are
+# never picked for being cheaper
+SUCCESS_TOLERANCE = 0.02
+# Priors, worth this many scrapes, before a domain has history
+PRIOR_WEIGHT = 2.0
+PRIOR_SECONDS = {'requests': 1.5, 'selenium': 12.0}
+
+
+class BackendStats:
+    """Decayed success count and smoothed latency for one backend on one domain"""
+
+    def __init__(self, attempts=0.0, successes=0.0, seconds=None):
+        self.attempts = attempts
+        self.successes = successes
+        self.seconds = seconds
+
+    def record(self, success, seconds):
+        self.attempts = self.attempts * DECAY + 1
+        self.successes = self.successes * DECAY + (1 if success else 0)
+        if self.seconds is None:
+            self.seconds = seconds
+        else:
+            self.seconds += LATENCY_SMOOTHING * (seconds - self.seconds)
+
+    def success_rate(self, prior):
+        return (self.successes + prior * PRIOR_WEIGHT) / (self.attempts + PRIOR_WEIGHT)
+
+    def cost(self, backend):
+        seconds = self.seconds if self.seconds is not None else PRIOR_SECONDS[backend]
+        return seconds * (SELENIUM_COST_FACTOR if backend == 'selenium' else 1.0)
+
+    def to_dict(self):
+        return {'attempts': round(self.attempts, 3), 'successes': round(self.successes, 3),
+                'seconds': round(self.seconds, 3) if self.seconds is not None else None}
+
+
+def prior_success(adapter, backend):
+    """What we expect before any history: the adapter's declared backend mostly works"""
+    if backend == 'selenium':
+        return 0.8
+    return 0.9 if adapter.backend == 'requests' else 0.5
+
+
+def plan_outcome(plan, rates, costs):
+    """(probability some step finds the price, expected cost) of running `plan` until one does"""
+    reached, cost = 1.0, 0.0
+    for backend in plan:
+        cost += reached * costs[backend]
+        reached *= 1 - rates[backend]
+    return 1 - reached, cost
+
+
+class BackendRouter:
+    """
+    Picks the backend order for each scrape from what has worked on that
+    domain: the plan with the lowest expected cost per successful price,
+    among those that find prices about as often as the best one.
+    """
+
+    def __init__(self, path=ROUTING_STATS_PATH, explore_rate=ROUTING_EXPLORE_RATE):
+        self.path = path
+        self.explore_rate = explore_rate
+        self._stats = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _load(self):
+        stats = {}
+        try:
+            with open(self.path) as f:
+                for domain, backends in json.load(f).items():
+                    stats[domain] = {backend: BackendStats(**values) for backend, values in backends.items()
+                                     if backend in BACKENDS}
+            print(f"🧭 Loaded backend stats for {len(stats)} domains")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ Ignoring unreadable backend stats in {self.path}: {e}")
+        atexit.register(self.save)
+        return stats
+
+    def _domain_stats(self, domain):
+        if self._stats is None:
+            self._stats = self._load()
+        return self._stats.setdefault(domain, {})
+
+    def plan(self, url, adapter, allowed=BACKENDS):
+        """Backends to try, in order, for this URL"""
+        candidates = [plan for plan in PLANS if all(backend in allowed for backend in plan)]
+        if len(candidates) == 1:
+            return list(candidates[0])
+        if random.random() < self.explore_rate:
+            return list(candidates[0])
+
+        with self._lock:
+            stats = self._domain_stats(get_domain(url))
+            rates, costs = {}, {}
+            for backend in BACKENDS:
+                backend_stats = stats.get(backend) or BackendStats()
+                rates[backend] = backend_stats.success_rate(prior_success(adapter, backend))
+                costs[backend] = backend_stats.cost(backend)
+
+        outcomes = {plan: plan_outcome(plan, rates, costs) for plan in candidates}
+        best_rate = max(rate for rate, _ in outcomes.values())
+        return list(min(
+            (plan for plan, (rate, _) in outcomes.items() if rate >= best_rate - SUCCESS_TOLERANCE),
+            key=lambda plan: outcomes[plan][1] / max(outcomes[plan][0], 1e-6)
+        ))
+
+    def record(self, url, backend, success, seconds):
+        with self._lock:
+            stats = self._domain_stats(get_domain(url))
+            stats.setdefault(backend, BackendStats()).record(success, seconds)
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= ROUTING_SAVE_SECONDS
+        if due:
+            self.save()
+
+    def snapshot(self):
+        with self._lock:
+            if self._stats is None:
+                self._stats = self._load()
+            return {domain: {backend: s.to_dict() for backend, s in backends.items()}
+                    for domain, backends in self._stats.items() if backends}
+
+    def save(self):
+        """Write the stats atomically; each process keeps its own view and the last writer wins"""
+        if not self._dirty:
+            return
+        data = self.snapshot()
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️ Couldn't save backend stats: {e}")
+        finally:
+            self._saved_at = time.monotonic()
+
+
+# Shared by every scrape in this process
+backend_router = BackendRouter()
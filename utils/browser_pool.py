@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+
+
+class BrowserPool:
+    """
+    Keeps up to `size` warm Chrome instances alive and leases them out
+    one scrape at a time. A browser is recycled after `max_pages` scrapes
+    or thrown away as soon as a scrape using it crashes.
+    """
+
+    def __init__(self, factory, size=2, max_pages=50, lease_timeout=120):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.lease_timeout = lease_timeout
+
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pages = {}
+        self._closed = False
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver: `with pool.lease() as driver: ...`"""
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise TimeoutError(f'No browser free after {self.lease_timeout}s')
+
+        driver = None
+        try:
+            driver = self._checkout()
+            yield driver
+        except BaseException:
+            # Whatever happened, this browser's state can't be trusted
+            if driver is not None:
+                self._discard(driver)
+                driver = None
+            raise
+        finally:
+            if driver is not None:
+                self._checkin(driver)
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+            if driver is None:
+                break
+            if self._is_alive(driver):
+                return driver
+            print("♻️ Dropping dead browser from pool")
+            self._discard(driver)
+
+        print(f"🚀 Launching new pooled browser ({len(self._pages) + 1}/{self.size})")
+        driver = self.factory()
+        with self._lock:
+            self._pages[id(driver)] = 0
+        return driver
+
+    def _checkin(self, driver):
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+            worn_out = self._pages[id(driver)] >= self.max_pages
+
+        if worn_out or self._closed:
+            print(f"♻️ Recycling browser after {self.max_pages} pages")
+            self._discard(driver)
+            return
+
+        try:
+            # Drop the previous page's DOM/JS heap before parking the browser
+            driver.get('about:blank')
+        except Exception:
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_alive(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def shutdown(self):
+        """Quit every idle browser (leased ones are quit on check-in)"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._discard(driver)
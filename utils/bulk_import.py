@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+import re
+from urllib.parse import urlparse
+
+# Never valid unencoded in a URL, and what turns one into markup
+UNSAFE_URL_CHARS = re.compile(r'[\s"\'<>\\`]')
+
+
+def detect_format(name_or_type):
+    """'csv' / 'jsonl' / 'lines' from a file name or a Content-Type"""
+    value = (name_or_type or '').lower()
+    if value.endswith('.csv') or 'csv' in value:
+        return 'csv'
+    if value.endswith(('.jsonl', '.ndjson')) or 'ndjson' in value or 'jsonl' in value:
+        return 'jsonl'
+    return 'lines'
+
+
+def iter_urls(text, fmt='lines'):
+    """
+    Raw URLs from an upload:
+    - csv: the 'url' column if there's a header with one, else the first column
+    - jsonl: one JSON string or {"url": ...} object per line
+    - lines: one URL per line
+    """
+    if fmt == 'csv':
+        rows = csv.reader(io.StringIO(text))
+        header = next(rows, [])
+        lowered = [cell.strip().lower() for cell in header]
+        column = lowered.index('url') if 'url' in lowered else 0
+        if 'url' not in lowered and header:
+            yield header[column]
+        for row in rows:
+            if len(row) > column:
+                yield row[column]
+        return
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if fmt == 'jsonl':
+            item = json.loads(line)
+            yield str(item.get('url') or '') if isinstance(item, dict) else str(item)
+        else:
+            yield line
+
+
+def is_valid_url(url):
+    """An http(s) URL with a hostname, at most 500 characters and nothing that needs escaping"""
+    if len(url) > 500 or UNSAFE_URL_CHARS.search(url):
+        return False
+    try:
+        parsed = urlparse(url)
+        return parsed.scheme in ('http', 'https') and bool(parsed.hostname)
+    except ValueError:
+        return False
+
+
+def clean_urls(urls):
+    """Strip, drop duplicates (keeping order) and split off invalid entries -> (valid, invalid)"""
+    valid, invalid, seen = [], [], set()
+    for url in urls:
+        # JSON bodies and JSONL lines can carry numbers or nulls
+        url = str(url or '').strip()
+        if not url or url in seen:
+            continue
+        seen.add(url)
+        if is_valid_url(url):
+            valid.append(url)
+        else:
+            invalid.append(url)
+    return valid, invalid
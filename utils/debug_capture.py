@@ -0,0 +1,93 @@
+import atexit
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+# Saving scraped pages for debugging selectors. Off by default; otherwise
+# 'failures' (pages we couldn't parse), 'sample' (failures plus a random
+# DEBUG_CAPTURE_SAMPLE_RATE share of successes) or 'all'
+DEBUG_CAPTURE = os.environ.get('DEBUG_CAPTURE', 'off')
+DEBUG_CAPTURE_SAMPLE_RATE = float(os.environ.get('DEBUG_CAPTURE_SAMPLE_RATE', 0.01))
+DEBUG_CAPTURE_DIR = os.environ.get('DEBUG_CAPTURE_DIR', 'debug_pages')
+# Oldest captures are deleted beyond this many files
+DEBUG_CAPTURE_MAX_FILES = int(os.environ.get('DEBUG_CAPTURE_MAX_FILES', 50))
+# Captures waiting for the writer thread; more than this are dropped, never waited on
+DEBUG_CAPTURE_QUEUE_SIZE = int(os.environ.get('DEBUG_CAPTURE_QUEUE_SIZE', 8))
+
+UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+_queue = queue.Queue(maxsize=DEBUG_CAPTURE_QUEUE_SIZE)
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def should_capture(success):
+    if DEBUG_CAPTURE == 'all':
+        return True
+    if DEBUG_CAPTURE in ('failures', 'sample') and not success:
+        return True
+    return DEBUG_CAPTURE == 'sample' and random.random() < DEBUG_CAPTURE_SAMPLE_RATE
+
+
+def capture(site, url, raw, success):
+    """
+    Queue a page for saving if the capture policy wants it -> saved file
+    name, or None. Returns immediately: the write happens on a background
+    thread, and when the queue is full the capture is dropped.
+    """
+    if not should_capture(success):
+        return None
+
+    reason = 'ok' if success else 'failed'
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{site}-{reason}-{UNSAFE_CHARS.sub('_', url)[-60:]}.html"
+    try:
+        _queue.put_nowait((name, url, raw))
+    except queue.Full:
+        return None
+
+    _ensure_writer()
+    return os.path.join(DEBUG_CAPTURE_DIR, name)
+
+
+def _ensure_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_write_loop, name='debug-capture', daemon=True)
+                _writer.start()
+                atexit.register(flush)
+
+
+def _write_loop():
+    while True:
+        name, url, raw = _queue.get()
+        try:
+            os.makedirs(DEBUG_CAPTURE_DIR, exist_ok=True)
+            with open(os.path.join(DEBUG_CAPTURE_DIR, name), 'wb') as f:
+                f.write(f'<!-- {url} -->\n'.encode('utf-8'))
+                f.write(raw)
+            _rotate()
+        except OSError as e:
+            print(f"⚠️ Debug capture failed: {e}")
+        finally:
+            _queue.task_done()
+
+
+def _rotate():
+    files = sorted(
+        (entry.stat().st_mtime, entry.path) for entry in os.scandir(DEBUG_CAPTURE_DIR)
+        if entry.is_file() and entry.name.endswith('.html')
+    )
+    for _, path in files[:max(0, len(files) - DEBUG_CAPTURE_MAX_FILES)]:
+        os.remove(path)
+
+
+def flush(timeout=5):
+    """Give queued captures a moment to hit the disk (at exit)"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
@@ -0,0 +1,63 @@
+import json
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml builds trees several times faster than html.parser; fall back if missing
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+JSON_LD_PATTERN = re.compile(
+    rb'<script[^>]+type=["\']?application/ld\+json["\']?[^>]*>(.*?)</script>',
+    re.S | re.I
+)
+
+
+def make_soup(html_content, tags=None):
+    """
+    Parse HTML with the fastest available backend. With `tags`, only those
+    elements (and their children) are built - the rest of a multi-MB retail
+    page is skipped by the tokenizer instead of becoming Tag objects.
+    """
+    parse_only = SoupStrainer(tags) if tags else None
+    return BeautifulSoup(html_content, PARSER, parse_only=parse_only)
+
+
+def iter_json_ld(html_content):
+    """
+    Yield each JSON-LD object on the page, scanning the raw bytes for
+    ld+json scripts lazily - no DOM is built. Lists and @graph are flattened.
+    """
+    if isinstance(html_content, str):
+        html_content = html_content.encode('utf-8')
+
+    for match in JSON_LD_PATTERN.finditer(html_content):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+
+        stack = [data]
+        while stack:
+            item = stack.pop(0)
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                if '@graph' in item:
+                    stack.extend(item['@graph'])
+                yield item
+
+
+def json_ld_offer_price(html_content):
+    """First offers.price found in the page's JSON-LD, as a raw string"""
+    for data in iter_json_ld(html_content):
+        offers = data.get('offers')
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        if isinstance(offers, dict):
+            price = offers.get('price') or offers.get('lowPrice')
+            if price:
+                return str(price)
+    return None
@@ -0,0 +1,113 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Hosts kept in the pool manager, and keep-alive connections per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 32))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5))
+# Needs `pip install httpx[http2]`; silently falls back to requests without it
+HTTP2_ENABLED = os.environ.get('HTTP2_ENABLED', '0') == '1'
+
+# 429/503 are left to utils.rate_limit, which slows the whole domain down
+# instead of hammering the same URL again
+RETRY_STATUSES = (500, 502, 504)
+
+_lock = threading.Lock()
+_session = None
+_http2_client = None
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        # urllib3 would otherwise sleep out and retry every 429/503 carrying
+        # Retry-After itself, hiding them from the rate limiter
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _build_http2_client():
+    try:
+        import httpx
+        import h2  # noqa: F401 - httpx only speaks HTTP/2 when h2 is installed
+    except ImportError:
+        print("⚠️ HTTP2_ENABLED but httpx[http2] is not installed. Using requests.")
+        return None
+
+    return httpx.Client(
+        http2=True,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE
+        ),
+        transport=httpx.HTTPTransport(http2=True, retries=HTTP_MAX_RETRIES)
+    )
+
+
+def get_session():
+    """
+    Process-wide requests.Session. Its urllib3 pool manager keeps one
+    connection pool per host, so repeat scrapes of the same retailer reuse
+    warm TCP+TLS connections. Safe to share between scrape threads.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_http2_client():
+    global _http2_client
+    if _http2_client is None:
+        with _lock:
+            if _http2_client is None:
+                _http2_client = _build_http2_client() or False
+    return _http2_client or None
+
+
+def fetch(url, headers=None, timeout=15):
+    """
+    GET a page through the shared pools (HTTP/2 when enabled).
+    Errors always surface as requests exceptions, whichever client ran.
+    """
+    client = get_http2_client() if HTTP2_ENABLED else None
+
+    if client is not None:
+        import httpx
+        try:
+            response = client.get(url, headers=headers, timeout=timeout)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+    else:
+        response = get_session().get(url, headers=headers, timeout=timeout)
+
+    if response.status_code >= 400:
+        raise requests.exceptions.HTTPError(
+            f'{response.status_code} Error for url: {url}',
+            response=response
+        )
+    return response
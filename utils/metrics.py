@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Keep the most recent samples per series so memory stays bounded
+MAX_SAMPLES = 1000
+
+# Histogram bucket upper bounds (seconds), from sub-millisecond parses to
+# slow browser loads
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+_lock = threading.Lock()
+_timings = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+# series key -> [count per bucket..., +Inf count, sum]
+_histograms = {}
+_counters = defaultdict(float)
+_help = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def describe(name, text):
+    """HELP line for a metric on /metrics"""
+    _help[name] = text
+
+
+def record_timing(name, seconds, **labels):
+    """Record one duration sample, e.g. record_timing('time_to_price', 1.8, site='walmart')"""
+    key = _key(name, labels)
+    with _lock:
+        _timings[key].append(seconds)
+
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(BUCKETS)] += 1
+        histogram[-1] += seconds
+
+
+def increment(name, amount=1, **labels):
+    """Bump a counter, e.g. increment('scrapes_total', site='walmart', outcome='success')"""
+    with _lock:
+        _counters[_key(name, labels)] += amount
+
+
+@contextmanager
+def timed(name, **labels):
+    """`with timed('scrape_stage_seconds', stage='parse', site=...):` records the block's duration"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started, **labels)
+
+
+def counter_values(name):
+    """[((name, labels), value)] for one counter"""
+    with _lock:
+        return [(key, value) for key, value in _counters.items() if key[0] == name]
+
+
+def reset():
+    """Drop every recorded sample and count (benchmarks measure one run at a time)"""
+    with _lock:
+        _timings.clear()
+        _histograms.clear()
+        _counters.clear()
+
+
+def timing_samples(name):
+    """Recent raw samples of one metric across all its label sets"""
+    with _lock:
+        return [value for (metric, _), values in _timings.items() if metric == name for value in values]
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus():
+    """Every counter and histogram in the Prometheus text exposition format"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+
+    lines = []
+    seen = set()
+
+    def header(name, kind):
+        if name not in seen:
+            seen.add(name)
+            if name in _help:
+                lines.append(f'# HELP {name} {_help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, 'counter')
+        # Full precision: :g would freeze a counter at 6 significant digits
+        lines.append(f'{name}{_format_labels(labels)} {int(value) if value.is_integer() else repr(value)}')
+
+    for (name, labels), histogram in sorted(histograms.items()):
+        header(name, 'histogram')
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(labels, [("le", f"{bound:g}")])} {cumulative}')
+        cumulative += histogram[len(BUCKETS)]
+        lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {histogram[-1]:.6f}')
+        lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port, host='0.0.0.0'):
+    """/metrics on its own port from a daemon thread, for processes without the web app (workers)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+describe('scrape_duration_seconds', 'End-to-end scrape_product time per site and backend')
+describe('scrape_stage_seconds', 'Time spent in each scrape stage')
+describe('scrapes_total', 'Scrapes by site, backend and outcome')
+describe('embedded_state_total', 'Plain-HTTP attempts at browser sites, by whether their embedded page data had the price')
+describe('selenium_time_to_price_seconds', 'Time from page load until the price was on the page')
+describe('browser_launch_seconds', 'Time to start a new pooled Chrome')
+describe('db_write_seconds', 'Time to store scrape results, per operation')
@@ -0,0 +1,74 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Processes that parse fetched pages. 0 parses on the scraping thread
+# (fine for a handful of products); set to the core count on a worker box
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 0))
+# Pages smaller than this aren't worth the round trip to another process
+PARSE_POOL_MIN_BYTES = int(os.environ.get('PARSE_POOL_MIN_BYTES', 64 * 1024))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _parse_in_worker(adapter_name, raw, url):
+    """Runs in a pool process: adapters are looked up by name, not pickled"""
+    from utils.sites import get_adapter_by_name
+    return get_adapter_by_name(adapter_name).parse(raw, url)
+
+
+def _init_worker():
+    # Warm the registry (and its compiled selectors/patterns) once per process
+    import utils.sites  # noqa: F401
+
+
+def get_parse_pool():
+    """Lazily start the shared pool, or None when PARSE_WORKERS is 0"""
+    global _pool
+    if PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the web and worker processes run threads
+            # (scheduler, scrape pool) that a forked child would inherit mid-flight
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_page(adapter, raw, url):
+    """
+    adapter.parse(raw, url), run in the process pool when one is configured
+    and the page is big enough to be worth it. Only the raw bytes go over -
+    they're never decoded here - and only the small result dict comes back.
+    Many scrape threads can wait on the pool at once, so parsing uses every
+    core instead of queueing behind the GIL.
+    """
+    pool = get_parse_pool() if len(raw) >= PARSE_POOL_MIN_BYTES else None
+    if pool is None:
+        return adapter.parse(raw, url)
+
+    try:
+        return pool.submit(_parse_in_worker, adapter.name, raw, url).result()
+    except BrokenProcessPool:
+        # A parser process died (e.g. OOM on a huge page): start fresh next
+        # time and don't lose this scrape
+        print("⚠️ Parse pool crashed, restarting it")
+        _reset_pool(pool)
+        return adapter.parse(raw, url)
@@ -0,0 +1,101 @@
+import re
+
+# Compiled once: a price-shaped number in US or European notation -
+# "1,234.56", "1.234,56", "1\u00a0234,56", "1'234.56", "12,50", "1234.5"
+NUMBER_PATTERN = re.compile(r"\d{1,3}(?:[,.'\u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?(?!\d)|\d+(?:[.,]\d+)?")
+GROUPING_CHARS = re.compile(r"['\u00a0\u202f]")
+
+MIN_PRICE = 0.01
+MAX_PRICE = 999999
+
+
+def parse_number(token, decimal=None):
+    """
+    '1,234.56' / '1.234,56' / '1\u00a0234,56' / '12,50' -> float.
+
+    Grouping spaces must be NBSP or narrow NBSP; an ASCII space ends the
+    number, since it also separates unrelated numbers in running text.
+
+    Without a `decimal` hint: when both ',' and '.' appear the last one is
+    the decimal mark. A single '.' is always a decimal mark ('24.950',
+    '19.989999' from a JSON float); a single ',' is one only before 1-2
+    digits ('12,50' but '1,234'). Repeated separators are grouping.
+    """
+    token = GROUPING_CHARS.sub('', token)
+
+    if decimal is None:
+        last_comma = token.rfind(',')
+        last_dot = token.rfind('.')
+        if last_comma != -1 and last_dot != -1:
+            decimal = ',' if last_comma > last_dot else '.'
+        elif last_comma != -1 or last_dot != -1:
+            sep = ',' if last_comma != -1 else '.'
+            digits_after = len(token) - token.rfind(sep) - 1
+            if token.count(sep) > 1:
+                decimal = None
+            elif sep == '.':
+                decimal = '.'
+            else:
+                decimal = ',' if digits_after in (1, 2) else None
+
+    if decimal:
+        grouping = '.' if decimal == ',' else ','
+        whole, _, fraction = token.replace(grouping, '').rpartition(decimal)
+        token = f"{whole.replace(decimal, '')}.{fraction}"
+    else:
+        token = token.replace(',', '').replace('.', '')
+
+    return float(token)
+
+
+def extract_price(price_text, decimal=None):
+    """Extract numeric price from text (or a number), None if outside 0.01-999999"""
+    if type(price_text) is not str:
+        if price_text is None or isinstance(price_text, bool):
+            return None
+        if isinstance(price_text, (int, float)):
+            price = float(price_text)
+            return round(price, 2) if MIN_PRICE <= price <= MAX_PRICE else None
+        if isinstance(price_text, bytes):
+            price_text = price_text.decode('utf-8', 'ignore')
+        price_text = str(price_text)
+
+    match = NUMBER_PATTERN.search(price_text)
+    if match is None:
+        return None
+    token = match.group()
+
+    # Digits with at most one '.' ("1234", "19.99", "24.950") are already
+    # what float() reads - no separator logic needed
+    if decimal is None and token.replace('.', '', 1).isdigit():
+        price = float(token)
+    else:
+        try:
+            price = parse_number(token, decimal)
+        except ValueError:
+            return None
+
+    if MIN_PRICE <= price <= MAX_PRICE:
+        return round(price, 2)
+    return None
+
+
+def scan_prices(raw, pattern, needle=None, low=MIN_PRICE, high=MAX_PRICE):
+    """
+    First in-range price captured by `pattern` (a compiled bytes regex)
+    in a raw page. With `needle`, pages that don't contain it are rejected
+    by a single memchr-style search, and the regex starts at its first hit
+    instead of the top of a multi-MB page (so every match must begin with
+    the needle). Nothing is decoded but the captured number.
+    """
+    pos = 0
+    if needle:
+        pos = raw.find(needle)
+        if pos == -1:
+            return None
+
+    for match in pattern.finditer(raw, pos):
+        price = extract_price(match.group(1).decode('ascii', 'ignore'))
+        if price and low <= price <= high:
+            return price
+    return None
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+
+from utils.rescrape import get_domain
+
+# Requests per second and burst size per retailer domain. Overrides look like
+# RATE_LIMITS="walmart.com=0.5:2,bestbuy.com=2:5"
+RATE_LIMIT_DEFAULT_RPS = float(os.environ.get('RATE_LIMIT_DEFAULT_RPS', 1.0))
+RATE_LIMIT_DEFAULT_BURST = int(os.environ.get('RATE_LIMIT_DEFAULT_BURST', 3))
+RATE_LIMITS = os.environ.get('RATE_LIMITS', '')
+
+# Adaptive slowdown: each 429/503 doubles a domain's spacing (up to this
+# factor); each success shrinks it back towards 1
+MAX_SLOWDOWN = 32
+RECOVERY = 0.9
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_rate_limits(spec):
+    """'walmart.com=0.5:2,bestbuy.com=2' -> {'walmart.com': (0.5, 2), 'bestbuy.com': (2.0, default burst)}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        domain, _, value = item.partition('=')
+        rate, _, burst = value.partition(':')
+        limits[domain.strip().lower()] = (float(rate), int(burst) if burst else RATE_LIMIT_DEFAULT_BURST)
+    return limits
+
+
+class TokenBucket:
+    """Classic token bucket; reserve() hands back how long the caller must wait"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.slowdown = 1.0
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            rate = self.rate / self.slowdown
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * rate)
+            self.updated = now
+
+            # Taking a token we don't have yet puts the bucket in debt, which
+            # queues concurrent callers one interval apart
+            self.tokens -= 1
+            wait = 0.0 if self.tokens >= 0 else -self.tokens / rate
+            return max(wait, self.blocked_until - now)
+
+
+class DomainRateLimiter:
+    """One token bucket per hostname, created on first use"""
+
+    def __init__(self, default_rate=RATE_LIMIT_DEFAULT_RPS, default_burst=RATE_LIMIT_DEFAULT_BURST, overrides=None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.overrides = overrides or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url):
+        domain = get_domain(url)
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(domain)
+                if bucket is None:
+                    rate, burst = self.overrides.get(domain, (self.default_rate, self.default_burst))
+                    bucket = TokenBucket(rate, burst)
+                    self._buckets[domain] = bucket
+        return bucket
+
+    def acquire(self, url):
+        """Block until this domain may be hit again; returns seconds waited"""
+        wait = self._bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, url, retry_after=None):
+        """The site pushed back (429/503): slow this domain down"""
+        bucket = self._bucket(url)
+        with bucket.lock:
+            bucket.slowdown = min(MAX_SLOWDOWN, bucket.slowdown * 2)
+            if retry_after:
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + retry_after)
+            print(f"🐢 Throttled by {get_domain(url)}: slowing to "
+                  f"{bucket.rate / bucket.slowdown:.2f} req/s")
+
+    def reward(self, url):
+        bucket = self._bucket(url)
+        with bucket.lock:
+            bucket.slowdown = max(1.0, bucket.slowdown * RECOVERY)
+
+
+def parse_retry_after(value):
+    """Retry-After in seconds (HTTP-date form is treated as 'unknown')"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# Shared by the requests and Selenium backends
+rate_limiter = DomainRateLimiter(overrides=parse_rate_limits(RATE_LIMITS))
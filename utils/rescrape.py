@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+
+def get_domain(url):
+    """Hostname without the leading www. (used as the per-domain key)"""
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+class DomainLimiter:
+    """Caps how many scrapes can hit the same domain at once"""
+
+    def __init__(self, per_domain):
+        self.per_domain = max(1, per_domain)
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, domain):
+        with self._lock:
+            sem = self._semaphores.get(domain)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_domain)
+                self._semaphores[domain] = sem
+            return sem
+
+    def run(self, url, func):
+        with self._semaphore(get_domain(url)):
+            return func(url)
+
+
+def interleave_by_domain(items):
+    """
+    Round-robin (key, url) pairs across domains so one big retailer
+    doesn't fill every worker slot while they wait on its domain cap.
+    """
+    buckets = OrderedDict()
+    for key, url in items:
+        buckets.setdefault(get_domain(url), deque()).append((key, url))
+
+    while buckets:
+        for domain in list(buckets):
+            queue = buckets[domain]
+            yield queue.popleft()
+            if not queue:
+                del buckets[domain]
+
+
+def scrape_many(items, scrape_func, max_workers=16, per_domain=4):
+    """
+    Scrape many URLs concurrently.
+
+    items: iterable of (key, url) pairs, key is handed back untouched.
+    Yields (key, result) as each scrape finishes. scrape_func must not touch
+    the database - results are written by the caller's thread.
+    """
+    limiter = DomainLimiter(per_domain)
+
+    def safe_scrape(url):
+        try:
+            return limiter.run(url, scrape_func)
+        except Exception as e:
+            return {
+                'title': None,
+                'price': None,
+                'success': False,
+                'error': f'Scraping error: {str(e)}'
+            }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(safe_scrape, url): key
+            for key, url in interleave_by_domain(items)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
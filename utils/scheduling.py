@@ -0,0 +1,120 @@
+import heapq
+import math
+import random
+import threading
+from datetime import datetime, timedelta
+
+
+def compute_interval(check_count, change_count, view_count, consecutive_failures,
+                     min_minutes=60, base_minutes=1440, max_minutes=4320):
+    """
+    Minutes until a product should be scraped again.
+
+    - Volatility (share of checks that saw the price move, not-modified
+      ones included) slides the
+      interval from max_minutes (never moves) down to min_minutes (moves on
+      a quarter or more of scrapes). New products start at base_minutes.
+    - Popularity (dashboard views) shortens it, at most 4x.
+    - Consecutive failures back it off exponentially so a blocked or dead
+      URL stops eating the budget.
+    """
+    if (check_count or 0) < 3:
+        interval = base_minutes
+    else:
+        volatility = (change_count or 0) / (check_count - 1)
+        interval = max_minutes * (min_minutes / max_minutes) ** min(1.0, volatility * 4)
+
+    interval /= min(4.0, 1 + math.log1p(view_count or 0) / 2)
+
+    if consecutive_failures:
+        interval = min_minutes * 2 ** min(consecutive_failures, 8)
+
+    # +/-10% jitter so products added together don't stay in lockstep
+    interval *= random.uniform(0.9, 1.1)
+    return max(min_minutes, min(max_minutes, interval))
+
+
+class DueQueue:
+    """
+    Min-heap of (due_at, product_id). Rescheduling a product just pushes a
+    new entry; stale ones are skipped on pop (lazy deletion), so every
+    operation stays O(log n).
+
+    Only a process that pops from the queue should fill it: until `active`
+    is set (by the in-memory dispatcher) push() and discard() do nothing.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+        self._lock = threading.Lock()
+        self.active = False
+
+    def __len__(self):
+        return len(self._due)
+
+    def push(self, product_id, due_at=None):
+        if not self.active:
+            return
+        due_at = due_at or datetime.utcnow()
+        with self._lock:
+            self._due[product_id] = due_at
+            heapq.heappush(self._heap, (due_at, product_id))
+
+    def discard(self, product_id):
+        if not self.active:
+            return
+        with self._lock:
+            self._due.pop(product_id, None)
+
+    def reset(self, entries):
+        """Rebuild from (product_id, due_at) pairs, e.g. a fresh DB read"""
+        with self._lock:
+            self._due = {pid: due_at or datetime.utcnow() for pid, due_at in entries}
+            self._heap = [(due_at, pid) for pid, due_at in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, now=None, limit=None):
+        """Remove and return ids of products due at or before `now`, soonest first"""
+        now = now or datetime.utcnow()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                if limit is not None and len(due) >= limit:
+                    break
+                due_at, product_id = heapq.heappop(self._heap)
+                if self._due.get(product_id) != due_at:
+                    continue
+                del self._due[product_id]
+                due.append(product_id)
+        return due
+
+
+class ViewCounter:
+    """
+    Product views counted in memory, so reading a chart never writes to the
+    database; flush_view_counts() in app.py adds them to view_count in batches.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, product_id, views=1):
+        with self._lock:
+            self._counts[product_id] = self._counts.get(product_id, 0) + views
+
+    def drain(self):
+        """Take every pending count -> {product_id: views}"""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        return counts
+
+    def restore(self, counts):
+        """Put back counts whose write failed, for the next flush"""
+        for product_id, views in counts.items():
+            self.add(product_id, views)
+
+
+def next_due_at(interval_minutes, now=None):
+    return (now or datetime.utcnow()) + timedelta(minutes=interval_minutes)
@@ -1,45 +1,157 @@
 import requests
-from bs4 import BeautifulSoup
-import re
 import random
+import hashlib
+import os
+import time
+from utils.backend_router import backend_router, BACKENDS
+from utils.http_session import fetch
+from utils.metrics import record_timing, increment, timed
+from utils.parse_pool import parse_page
+from utils.rate_limit import rate_limiter, parse_retry_after, THROTTLE_STATUSES
+from utils.sites import get_adapter, region_chunks
 
-def scrape_product(url):
+# Browser sites may be fetched with plain HTTP and parsed from the JSON
+# state they embed (window.runParams, __NEXT_DATA__, JSON-LD) before Chrome
+# is started. 0 sends them straight to Chrome
+EMBEDDED_STATE_FIRST = os.environ.get('EMBEDDED_STATE_FIRST', '1') == '1'
+
+
+def scrape_product(url, validators=None):
     """
-    Smart router: Selenium for JS sites, requests for static sites
+    Smart router: tries the backends the router expects to be cheapest for
+    this domain, escalating to Selenium when a cheaper one fetched the page
+    but found no price (price_missing). Throttles and network errors end the
+    scrape - the next backend would hit the same wall - and aren't held
+    against the backend in the router's stats.
+    
+    validators: etag / last_modified / content_hash saved from the previous
+    scrape. When the page hasn't changed the result has not_modified=True
+    and no price - callers should skip their DB writes.
     """
-    # AliExpress needs Selenium
-    if 'aliexpress' in url.lower():
-        from utils.selenium_scraper import scrape_with_selenium
-        print("🤖 Using Selenium for AliExpress")
-        return scrape_with_selenium(url)
+    adapter = get_adapter(url)
+    allowed = BACKENDS
+    if adapter.backend == 'selenium' and not EMBEDDED_STATE_FIRST:
+        allowed = ('selenium',)
+    plan = backend_router.plan(url, adapter, allowed)
+    
+    for step, backend in enumerate(plan):
+        if step:
+            print(f"↪️ {plan[step - 1]} found no price, escalating to {backend}")
+        started = time.perf_counter()
+        
+        if backend == 'selenium':
+            # JS-rendered pages: a real browser
+            from utils.selenium_scraper import scrape_with_selenium
+            print(f"🤖 Using Selenium for {adapter.label}")
+            result = scrape_with_selenium(url)
+        elif adapter.backend == 'selenium':
+            result = scrape_embedded_state(url, adapter, validators)
+        else:
+            # Fast requests
+            print(f"⚡ Using requests for {url}")
+            result = scrape_with_requests(url, validators)
+        
+        seconds = time.perf_counter() - started
+        if result['success'] or result.get('price_missing'):
+            backend_router.record(url, backend, result['success'], seconds)
+        record_scrape(adapter.name, backend, result, seconds)
+        if not result.get('price_missing'):
+            break
     
-    # Everyone else: fast requests
-    print(f"⚡ Using requests for {url}")
-    return scrape_with_requests(url)
+    return result
+
+
+def scrape_embedded_state(url, adapter, validators=None):
+    """
+    Plain-HTTP attempt at a browser site. The adapter's non-Selenium rules
+    read the JSON state the page ships for its own scripts, so a hit costs
+    one request instead of a Chrome page load. Hits and misses are counted
+    per site (embedded_state_total) to show where the browser is still needed.
+    """
+    print(f"🧩 Trying embedded page data for {adapter.label}")
+    result = scrape_with_requests(url, validators)
+    
+    if result['success']:
+        increment('embedded_state_total', site=adapter.name, outcome='hit')
+    elif result.get('price_missing'):
+        increment('embedded_state_total', site=adapter.name, outcome='miss')
+        print(f"🧩 No price in {adapter.label}'s page data")
+    return result
+
+
+def record_scrape(site, backend, result, seconds):
+    """Outcome counter + end-to-end duration histogram for /metrics"""
+    if result.get('not_modified'):
+        outcome = 'not_modified'
+    else:
+        outcome = 'success' if result['success'] else 'failure'
+    increment('scrapes_total', site=site, backend=backend, outcome=outcome)
+    record_timing('scrape_duration_seconds', seconds, site=site, backend=backend)
 
 
-def scrape_with_requests(url):
+def scrape_with_requests(url, validators=None):
     """Fast scraping with requests + rotating headers"""
+    adapter = get_adapter(url)
+    labels = {'site': adapter.name, 'backend': 'requests'}
     try:
+        validators = validators or {}
         headers = get_random_headers()
         
+        # Conditional GET: a 304 costs no body and no parsing
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        
+        # Wait our turn for this retailer
+        waited = rate_limiter.acquire(url)
+        record_timing('scrape_stage_seconds', waited, stage='rate_limit_wait', **labels)
+        
         print(f"📡 Fetching {url[:50]}...")
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        fetch_started = time.perf_counter()
+        response = fetch(url, headers=headers, timeout=15)
+        fetched = time.perf_counter() - fetch_started
+        rate_limiter.reward(url)
+        
+        # elapsed runs until the headers arrived: DNS + connect + TLS + server time
+        ttfb = min(response.elapsed.total_seconds(), fetched)
+        record_timing('scrape_stage_seconds', ttfb, stage='ttfb', **labels)
+        record_timing('scrape_stage_seconds', fetched - ttfb, stage='download', **labels)
+        
+        if response.status_code == 304:
+            print("💤 304 Not Modified")
+            return not_modified_result(validators)
         
         print(f"✅ Got response ({len(response.content)} bytes)")
         
-        # Route to site-specific parser
-        if 'walmart' in url.lower():
-            return parse_walmart(response.content, url)
-        elif 'bestbuy' in url.lower():
-            return parse_bestbuy(response.content, url)
-        elif 'newegg' in url.lower():
-            return parse_newegg(response.content, url)
+        with timed('scrape_stage_seconds', stage='hash', **labels):
+            content_hash = content_region_hash(response.content, adapter)
+        new_validators = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash
+        }
+        
+        if new_validators['content_hash'] and new_validators['content_hash'] == validators.get('content_hash'):
+            print("💤 Price region unchanged, skipping parse")
+            return not_modified_result(new_validators)
+        
+        with timed('scrape_stage_seconds', stage='parse', **labels):
+            result = parse_page(adapter, response.content, url)
+        
+        if result['success']:
+            result['validators'] = new_validators
         else:
-            return parse_generic(response.content, url)
+            # We have the page, it just didn't give up a price - a browser might
+            result['price_missing'] = True
+        return result
             
     except requests.exceptions.RequestException as e:
+        # 429/503 mean we're going too fast for this site: back off
+        response = getattr(e, 'response', None)
+        if response is not None and response.status_code in THROTTLE_STATUSES:
+            rate_limiter.penalize(url, parse_retry_after(response.headers.get('Retry-After')))
+        
         return {
             'title': None,
             'price': None,
@@ -55,6 +167,38 @@ def scrape_with_requests(url):
         }
 
 
+def content_region_hash(content, adapter):
+    """
+    SHA-256 of the parts of the raw page the adapter's rules read (see
+    SiteAdapter.hash_regions), or of the whole page when they can't be cut
+    out. None if no region was found.
+    """
+    if adapter.hash_regions is None:
+        return hashlib.sha256(content).hexdigest()
+    
+    digest = hashlib.sha256()
+    found = False
+    
+    for region in adapter.hash_regions:
+        for chunk in region_chunks(region, content):
+            digest.update(chunk)
+            found = True
+    
+    return digest.hexdigest() if found else None
+
+
+def not_modified_result(validators):
+    """Successful scrape that found nothing new - no title or price to store"""
+    return {
+        'title': None,
+        'price': None,
+        'success': True,
+        'not_modified': True,
+        'error': None,
+        'validators': validators
+    }
+
+
 def get_random_headers():
     """Rotate user agents to avoid detection"""
     user_agents = [
@@ -73,225 +217,3 @@ def get_random_headers():
         'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
     }
-
-
-def parse_walmart(html_content, url):
-    """Parse Walmart HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Save debug
-    with open('walmart_debug.html', 'w', encoding='utf-8') as f:
-        f.write(str(soup))
-    print("📄 Saved walmart_debug.html")
-    
-    # Title
-    title = None
-    title_elem = soup.find('h1', {'itemprop': 'name'})
-    if not title_elem:
-        title_elem = soup.find('h1')
-    if not title_elem:
-        meta = soup.find('meta', {'property': 'og:title'})
-        if meta:
-            title = meta.get('content', '')
-    
-    if title_elem:
-        title = title_elem.get_text().strip()
-    
-    print(f"📝 Title: {title[:50] if title else 'NOT FOUND'}...")
-    
-    # Price
-    price = None
-    
-    # Try itemprop
-    price_elem = soup.find('span', {'itemprop': 'price'})
-    if price_elem:
-        price = extract_price(price_elem.get('content') or price_elem.get_text())
-    
-    # Try data-price
-    if not price:
-        price_elem = soup.find(attrs={'data-price': True})
-        if price_elem:
-            price = extract_price(price_elem.get('data-price'))
-    
-    # Regex search
-    if not price:
-        price_patterns = re.findall(r'"price"[:\s]+"?([\d,]+\.?\d{0,2})"?', str(html_content))
-        for match in price_patterns:
-            potential = extract_price(match)
-            if potential and 0.99 <= potential <= 50000:
-                price = potential
-                break
-    
-    print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-    
-    if title and price:
-        return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-    else:
-        return {
-            'title': title,
-            'price': price,
-            'success': False,
-            'error': f'Walmart: title={bool(title)}, price={bool(price)}. Check walmart_debug.html'
-        }
-
-
-def parse_bestbuy(html_content, url):
-    """Parse BestBuy HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    with open('bestbuy_debug.html', 'w', encoding='utf-8') as f:
-        f.write(str(soup))
-    print("📄 Saved bestbuy_debug.html")
-    
-    # Title
-    title = None
-    title_elem = soup.find('h1')
-    if title_elem:
-        title = title_elem.get_text().strip()
-    
-    if not title:
-        meta = soup.find('meta', {'property': 'og:title'})
-        if meta:
-            title = meta.get('content', '')
-    
-    print(f"📝 Title: {title[:50] if title else 'NOT FOUND'}...")
-    
-    # Price - BestBuy embeds in JSON
-    price = None
-    
-    # Look in script tags for JSON data
-    scripts = soup.find_all('script', {'type': 'application/ld+json'})
-    for script in scripts:
-        try:
-            import json
-            data = json.loads(script.string)
-            if isinstance(data, dict) and 'offers' in data:
-                price = extract_price(str(data['offers'].get('price', '')))
-                if price:
-                    break
-        except:
-            continue
-    
-    # Regex fallback
-    if not price:
-        price_patterns = re.findall(r'"price"[:\s]+([\d,]+\.?\d{0,2})', str(html_content))
-        for match in price_patterns:
-            potential = extract_price(match)
-            if potential and 9.99 <= potential <= 50000:
-                price = potential
-                break
-    
-    print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-    
-    if title and price:
-        return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-    else:
-        return {
-            'title': title,
-            'price': price,
-            'success': False,
-            'error': f'BestBuy: title={bool(title)}, price={bool(price)}. Check bestbuy_debug.html'
-        }
-
-
-def parse_newegg(html_content, url):
-    """Parse Newegg HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    with open('newegg_debug.html', 'w', encoding='utf-8') as f:
-        f.write(str(soup))
-    print("📄 Saved newegg_debug.html")
-    
-    # Title
-    title = None
-    title_elem = soup.find('h1', class_='product-title')
-    if not title_elem:
-        title_elem = soup.find('h1')
-    
-    if title_elem:
-        title = title_elem.get_text().strip()
-    
-    if not title:
-        meta = soup.find('meta', {'property': 'og:title'})
-        if meta:
-            title = meta.get('content', '')
-    
-    print(f"📝 Title: {title[:50] if title else 'NOT FOUND'}...")
-    
-    # Price
-    price = None
-    price_elem = soup.find('li', class_='price-current')
-    if price_elem:
-        price_text = price_elem.get_text()
-        price = extract_price(price_text)
-    
-    # JSON fallback
-    if not price:
-        scripts = soup.find_all('script', {'type': 'application/ld+json'})
-        for script in scripts:
-            try:
-                import json
-                data = json.loads(script.string)
-                if 'offers' in data:
-                    price = extract_price(str(data['offers'].get('price', '')))
-                    if price:
-                        break
-            except:
-                continue
-    
-    print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-    
-    if title and price:
-        return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-    else:
-        return {
-            'title': title,
-            'price': price,
-            'success': False,
-            'error': f'Newegg: title={bool(title)}, price={bool(price)}. Check newegg_debug.html'
-        }
-
-
-def parse_generic(html_content, url):
-    """Generic fallback parser"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    title = None
-    title_elem = soup.find('h1')
-    if title_elem:
-        title = title_elem.get_text().strip()
-    
-    price = None
-    price_elems = soup.find_all(class_=re.compile('price', re.I))
-    for elem in price_elems:
-        price = extract_price(elem.get_text())
-        if price:
-            break
-    
-    if title and price:
-        return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-    else:
-        return {'title': None, 'price': None, 'success': False, 'error': 'Generic scraper failed'}
-
-
-def extract_price(price_text):
-    """Extract numeric price from text"""
-    if not price_text:
-        return None
-    
-    price_text = str(price_text).strip()
-    matches = re.findall(r'[\d,]+\.?\d*', price_text)
-    
-    if not matches:
-        return None
-    
-    price_str = matches[0].replace(',', '')
-    
-    try:
-        price = float(price_str)
-        if 0.01 <= price <= 999999:
-            return round(price, 2)
-    except ValueError:
-        pass
-    
-    return None
\ No newline at end of file
@@ -2,12 +2,83 @@ import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException
 import time
-import re
 import os
+import atexit
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from utils.browser_pool import BrowserPool
+from utils.metrics import record_timing, timed
+from utils.rate_limit import rate_limiter
+from utils.sites import get_adapter
+
+# What Chrome is allowed to download. 'light' skips images, media, fonts and
+# tracker/ad scripts; 'strict' also skips stylesheets; 'off' loads everything.
+# Adapters can keep a category (or pattern) their price needs via allow_resources
+SELENIUM_BLOCK_PROFILE = os.environ.get('SELENIUM_BLOCK_PROFILE', 'light')
+# Extra comma-separated URL patterns to block everywhere, e.g. "*.mp4*,*chat-widget*"
+SELENIUM_BLOCK_EXTRA = [p.strip() for p in os.environ.get('SELENIUM_BLOCK_EXTRA', '').split(',') if p.strip()]
+
+# Network.setBlockedURLs patterns: '*' is the only wildcard, trailing '*'
+# catches query strings
+BLOCKED_RESOURCES = {
+    'images': ['*.png*', '*.jpg*', '*.jpeg*', '*.gif*', '*.webp*', '*.avif*', '*.svg*', '*.ico*'],
+    'media': ['*.mp4*', '*.webm*', '*.m3u8*', '*.mp3*'],
+    'fonts': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'trackers': [
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+        '*googlesyndication.com*', '*googleadservices.com*', '*facebook.net*',
+        '*connect.facebook.com*', '*amazon-adsystem.com*', '*criteo.com*', '*criteo.net*',
+        '*adsrvr.org*', '*hotjar.com*', '*scorecardresearch.com*', '*quantserve.com*',
+        '*bat.bing.com*', '*analytics.tiktok.com*', '*clarity.ms*', '*newrelic.com*', '*nr-data.net*',
+    ],
+    'css': ['*.css*'],
+}
+BLOCK_PROFILES = {
+    'off': (),
+    'light': ('images', 'media', 'fonts', 'trackers'),
+    'strict': ('images', 'media', 'fonts', 'trackers', 'css'),
+}
+
+
+def block_categories():
+    if SELENIUM_BLOCK_PROFILE not in BLOCK_PROFILES:
+        print(f"⚠️ Unknown SELENIUM_BLOCK_PROFILE '{SELENIUM_BLOCK_PROFILE}', using 'light'")
+        return BLOCK_PROFILES['light']
+    return BLOCK_PROFILES[SELENIUM_BLOCK_PROFILE]
+
+
+def blocked_urls(adapter):
+    """URL patterns to block while scraping this site: the profile minus the site's allow_resources"""
+    allowed = set(adapter.allow_resources)
+    patterns = []
+    for category in block_categories():
+        if category in allowed:
+            continue
+        patterns.extend(p for p in BLOCKED_RESOURCES[category] if p not in allowed)
+    patterns.extend(p for p in SELENIUM_BLOCK_EXTRA if p not in allowed)
+    return tuple(patterns)
+
+
+def apply_resource_blocking(driver, adapter):
+    """
+    Tell Chrome (over CDP) which URLs to refuse for this site. Everything,
+    images included, goes through this list so allow_resources always
+    applies; pooled browsers move between sites, so it's re-sent only when
+    the list changes.
+    """
+    patterns = blocked_urls(adapter)
+    if getattr(driver, 'blocked_urls', None) == patterns:
+        return
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+        driver.blocked_urls = patterns
+    except Exception as e:
+        # Still scrapeable, just heavier
+        print(f"⚠️ Couldn't set blocked URLs: {e}")
 
 
 def init_driver():
@@ -49,533 +120,192 @@ def init_driver():
 
     return driver
 
-def scrape_with_selenium(url):
-    """Main scraper with TIMEOUT"""
-    driver = None
-    try:
-        print(f"🤖 Starting UNDETECTED Chrome for: {url}")
-        driver = init_driver()
-        
-        # Set page load timeout
-        driver.set_page_load_timeout(30)  # Max 30 seconds
-        
-        print(f"🌐 Loading page...")
-        try:
-            driver.get(url)
-        except:
-            # Timeout or error - continue anyway
-            print("⚠️ Page load timed out, continuing...")
-        
-        # Shorter wait
-        time.sleep(4)  # Reduced from 6
-        
-        print(f"📄 Page loaded. Title: {driver.title[:50]}...")
-        
-        # Route to site-specific scraper
-        if 'aliexpress' in url.lower():
-            result = scrape_aliexpress(driver, url)
-        elif 'walmart' in url.lower():
-            result = scrape_walmart(driver, url)
-        elif 'bestbuy' in url.lower():
-            result = scrape_bestbuy(driver, url)
-        elif 'newegg' in url.lower():
-            result = scrape_newegg(driver, url)
-        else:
-            result = scrape_generic(driver, url)
-        
-        driver.quit()
-        return result
-        
-    except Exception as e:
-        if driver:
+
+def launch_driver():
+    """init_driver, timed - the pool calls this whenever it needs a new browser"""
+    with timed('browser_launch_seconds'):
+        return init_driver()
+
+
+# One pool per process, shared by /add-product, /rescrape and the scheduler
+SELENIUM_POOL_SIZE = int(os.environ.get('SELENIUM_POOL_SIZE', 2))
+SELENIUM_MAX_PAGES_PER_BROWSER = int(os.environ.get('SELENIUM_MAX_PAGES_PER_BROWSER', 50))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Lazily create the shared warm-browser pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                launch_driver,
+                size=SELENIUM_POOL_SIZE,
+                max_pages=SELENIUM_MAX_PAGES_PER_BROWSER
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+# Per-site readiness rules live on the site adapters (utils/sites.py): the
+# first of `selectors` to appear (or `js` returning truthy) ends the wait; if
+# nothing shows up before `timeout` seconds we scrape whatever loaded.
+# Network idle = no new resource entries for this long after readyState is complete
+NETWORK_IDLE_SECONDS = 0.5
+
+# Browsers can't see status codes; these page titles are how a 429/503 or a
+# bot wall shows up instead
+THROTTLE_TITLE_MARKERS = ('too many requests', 'service unavailable', 'access denied',
+                          'robot or human', 'are you a human', 'captcha')
+
+
+class price_ready:
+    """WebDriverWait condition: a price selector, the JS state blob, or network idle"""
+    
+    def __init__(self, rule):
+        self.locators = [(By.CSS_SELECTOR, css) for css in rule.get('selectors', [])]
+        self.js = rule.get('js')
+        self.network_idle = rule.get('network_idle', False)
+        self._resources = None
+        self._stable_since = None
+    
+    def __call__(self, driver):
+        if self.js:
             try:
-                driver.quit()
-            except:
+                if driver.execute_script(self.js):
+                    return 'js'
+            except Exception:
                 pass
         
-        import traceback
-        print(f"❌ CRASH: {traceback.format_exc()}")
+        for locator in self.locators:
+            if driver.find_elements(*locator):
+                return 'selector'
         
-        return {
-            'title': None,
-            'price': None,
-            'success': False,
-            'error': f'Scraper timeout or crash. Site may be too slow or blocking.'
-        }
+        if self.network_idle:
+            return self._check_network_idle(driver)
+        return False
+    
+    def _check_network_idle(self, driver):
+        state = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length];"
+        )
+        if state[0] != 'complete':
+            return False
+        
+        now = time.monotonic()
+        if state[1] != self._resources:
+            self._resources = state[1]
+            self._stable_since = now
+            return False
+        if now - self._stable_since >= NETWORK_IDLE_SECONDS:
+            return 'network_idle'
+        return False
 
-def scrape_walmart(driver, url):
-    """Walmart scraper"""
+
+def wait_for_price(driver, adapter):
+    """
+    Block until the site's price is on the page (or its deadline passes).
+    Records time-to-price so we can see what each retailer really needs.
+    """
+    rule = adapter.ready
+    site = adapter.name
+    started = time.monotonic()
+    
     try:
-        print("🔍 Scraping Walmart...")
-        
-        # Save debug
-        with open('walmart_debug.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        print("📄 Saved walmart_debug.html")
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # TITLE
-        title = None
-        
-        # Try h1 with itemprop
-        title_elem = soup.find('h1', {'itemprop': 'name'})
-        if not title_elem:
-            title_elem = soup.find('h1', class_=re.compile('prod.*title', re.I))
-        if not title_elem:
-            title_elem = soup.find('h1')
-        
-        if title_elem:
-            title = title_elem.get_text().strip()
-            print(f"✅ Title: {title[:50]}...")
-        
-        # Fallback to meta
-        if not title:
-            meta = soup.find('meta', {'property': 'og:title'})
-            if meta:
-                title = meta.get('content', '').strip()
-        
-        if not title:
-            title = driver.title.split('|')[0].split('-')[0].strip()
-        
-        # PRICE
-        price = None
-        
-        # Try itemprop price
-        price_elem = soup.find('span', {'itemprop': 'price'})
-        if not price_elem:
-            # Try aria-label with price
-            price_elems = soup.find_all(attrs={'aria-label': re.compile('price', re.I)})
-            for elem in price_elems:
-                price = extract_price(elem.get_text())
-                if price:
-                    break
-        else:
-            price = extract_price(price_elem.get_text())
-        
-        # Fallback: search for price patterns
-        if not price:
-            price_patterns = re.findall(r'\$\s*([\d,]+\.?\d{2})', driver.page_source)
-            for match in price_patterns:
-                potential_price = extract_price(match)
-                if potential_price and 0.99 <= potential_price <= 50000:
-                    price = potential_price
-                    break
-        
-        # Try Selenium directly
-        if not price:
-            try:
-                price_elem = driver.find_element(By.CSS_SELECTOR, '[itemprop="price"]')
-                price = extract_price(price_elem.text or price_elem.get_attribute('content'))
-            except:
-                pass
-        
-        print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-        
-        if title and price:
-            return {
-                'title': title[:250],
-                'price': price,
-                'success': True,
-                'error': None
-            }
-        else:
-            return {
-                'title': title,
-                'price': price,
-                'success': False,
-                'error': f'Walmart: title={bool(title)}, price={bool(price)}. Check walmart_debug.html'
-            }
-            
-    except Exception as e:
-        return {
-            'title': None,
-            'price': None,
-            'success': False,
-            'error': f'Walmart error: {str(e)}'
-        }
+        reason = WebDriverWait(driver, rule['timeout'], poll_frequency=0.25).until(price_ready(rule))
+    except TimeoutException:
+        reason = 'timeout'
+    
+    elapsed = time.monotonic() - started
+    record_timing('selenium_time_to_price_seconds', elapsed, site=site, outcome=reason)
+    print(f"⏱️ {site} ready after {elapsed:.1f}s ({reason})")
+    return reason
 
 
-def scrape_bestbuy(driver, url):
-    """BestBuy scraper"""
+def scrape_with_selenium(url):
+    """Main scraper with TIMEOUT"""
+    adapter = get_adapter(url)
+    labels = {'site': adapter.name, 'backend': 'selenium'}
     try:
-        print("🔍 Scraping BestBuy...")
-        
-        # Save debug
-        with open('bestbuy_debug.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        print("📄 Saved bestbuy_debug.html")
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # TITLE
-        title = None
-        
-        # BestBuy uses specific classes
-        title_elem = soup.find('h1', class_=re.compile('heading', re.I))
-        if not title_elem:
-            title_elem = soup.find('h1')
-        
-        if title_elem:
-            title = title_elem.get_text().strip()
-            print(f"✅ Title: {title[:50]}...")
-        
-        # Meta fallback
-        if not title:
-            meta = soup.find('meta', {'property': 'og:title'})
-            if meta:
-                title = meta.get('content', '').strip()
-        
-        if not title:
-            title = driver.title.split('|')[0].split('-')[0].strip()
-        
-        # PRICE
-        price = None
-        
-        # BestBuy typically uses aria-hidden spans for prices
-        price_elems = soup.find_all('span', {'aria-hidden': 'true'})
-        for elem in price_elems:
-            text = elem.get_text().strip()
-            if '$' in text:
-                price = extract_price(text)
-                if price and 0.99 <= price <= 50000:
-                    break
-        
-        # Try priceView class
-        if not price:
-            price_elem = soup.find('div', class_=re.compile('priceView', re.I))
-            if price_elem:
-                price = extract_price(price_elem.get_text())
-        
-        # Try data-price attribute
-        if not price:
-            price_elem = soup.find(attrs={'data-price': True})
-            if price_elem:
-                price = extract_price(price_elem.get('data-price', ''))
-        
-        # Selenium fallback
-        if not price:
-            try:
-                price_elem = driver.find_element(By.CSS_SELECTOR, '[class*="priceView"]')
-                price = extract_price(price_elem.text)
-            except:
-                pass
-        
-        # Last resort: regex
-        if not price:
-            price_patterns = re.findall(r'\$\s*([\d,]+\.?\d{2})', driver.page_source)
-            for match in price_patterns:
-                potential_price = extract_price(match)
-                if potential_price and 9.99 <= potential_price <= 50000:
-                    price = potential_price
-                    break
-        
-        print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-        
-        if title and price:
-            return {
-                'title': title[:250],
-                'price': price,
-                'success': True,
-                'error': None
-            }
-        else:
-            return {
-                'title': title,
-                'price': price,
-                'success': False,
-                'error': f'BestBuy: title={bool(title)}, price={bool(price)}. Check bestbuy_debug.html'
-            }
+        # Same per-domain budget as the requests backend. Waited out before
+        # leasing, so a throttled site never holds a warm browser idle
+        waited = rate_limiter.acquire(url)
+        record_timing('scrape_stage_seconds', waited, stage='rate_limit_wait', **labels)
+        
+        lease_started = time.perf_counter()
+        with get_browser_pool().lease() as driver:
+            # Includes launching a browser when none is warm
+            record_timing('scrape_stage_seconds', time.perf_counter() - lease_started, stage='browser_lease', **labels)
+            print(f"🤖 Leased pooled Chrome for: {url}")
+            
+            # Set page load timeout
+            driver.set_page_load_timeout(30)  # Max 30 seconds
+            
+            # Skip images, fonts, trackers... this site doesn't need for its price
+            apply_resource_blocking(driver, adapter)
+            
+            print(f"🌐 Loading page...")
+            with timed('scrape_stage_seconds', stage='page_load', **labels):
+                try:
+                    driver.get(url)
+                except:
+                    # Timeout or error - continue anyway
+                    print("⚠️ Page load timed out, continuing...")
             
+            # Wait only as long as this page needs to render its price
+            with timed('scrape_stage_seconds', stage='page_wait', **labels):
+                wait_for_price(driver, adapter)
+            
+            page_title = driver.title or ''
+            print(f"📄 Page loaded. Title: {page_title[:50]}...")
+            
+            throttled = is_throttled(page_title)
+            if throttled:
+                rate_limiter.penalize(url)
+            else:
+                rate_limiter.reward(url)
+            
+            with timed('scrape_stage_seconds', stage='parse', **labels):
+                result = scrape_page(driver, adapter, url)
+            # A rate-limit or bot-check page isn't evidence against the browser
+            if not result['success'] and not throttled:
+                result['price_missing'] = True
+            return result
+        
     except Exception as e:
+        # The pool has already quit the crashed browser
+        import traceback
+        print(f"❌ CRASH: {traceback.format_exc()}")
+        
         return {
             'title': None,
             'price': None,
             'success': False,
-            'error': f'BestBuy error: {str(e)}'
+            'error': f'Scraper timeout or crash. Site may be too slow or blocking.'
         }
 
 
-def scrape_newegg(driver, url):
-    """Newegg scraper"""
+def is_throttled(page_title):
+    """Did the site answer with a rate-limit or bot-check page?"""
+    title = page_title.lower()
+    return any(marker in title for marker in THROTTLE_TITLE_MARKERS)
+
+
+def scrape_page(driver, adapter, url):
+    """Run the site's adapter rules over the rendered page"""
     try:
-        print("🔍 Scraping Newegg...")
-        
-        # Save debug
-        with open('newegg_debug.html', 'w', encoding='utf-8') as f:
-            f.write(driver.page_source)
-        print("📄 Saved newegg_debug.html")
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # TITLE
-        title = None
-        
-        # Newegg uses page-title class
-        title_elem = soup.find('h1', class_='product-title')
-        if not title_elem:
-            title_elem = soup.find('h1')
-        
-        if title_elem:
-            title = title_elem.get_text().strip()
-            print(f"✅ Title: {title[:50]}...")
-        
-        # Meta fallback
-        if not title:
-            meta = soup.find('meta', {'property': 'og:title'})
-            if meta:
-                title = meta.get('content', '').strip()
-        
-        if not title:
-            title = driver.title.split('|')[0].split('-')[0].strip()
-        
-        # PRICE
-        price = None
-        
-        # Newegg uses price-current class
-        price_elem = soup.find('li', class_='price-current')
-        if price_elem:
-            # Price is split into dollars and cents
-            strong = price_elem.find('strong')
-            sup = price_elem.find('sup')
-            if strong:
-                price_text = strong.get_text()
-                if sup:
-                    price_text += '.' + sup.get_text()
-                price = extract_price(price_text)
-        
-        # Try item-price
-        if not price:
-            price_elem = soup.find('div', class_='product-price')
-            if price_elem:
-                price = extract_price(price_elem.get_text())
-        
-        # Selenium fallback
-        if not price:
-            try:
-                price_elem = driver.find_element(By.CLASS_NAME, 'price-current')
-                price = extract_price(price_elem.text)
-            except:
-                pass
-        
-        # Regex fallback
-        if not price:
-            price_patterns = re.findall(r'\$\s*([\d,]+\.?\d{2})', driver.page_source)
-            for match in price_patterns:
-                potential_price = extract_price(match)
-                if potential_price and 0.99 <= potential_price <= 50000:
-                    price = potential_price
-                    break
-        
-        print(f"💰 Price: ${price if price else 'NOT FOUND'}")
-        
-        if title and price:
-            return {
-                'title': title[:250],
-                'price': price,
-                'success': True,
-                'error': None
-            }
-        else:
-            return {
-                'title': title,
-                'price': price,
-                'success': False,
-                'error': f'Newegg: title={bool(title)}, price={bool(price)}. Check newegg_debug.html'
-            }
-            
+        print(f"🔍 Scraping {adapter.label}...")
+        # page_source serializes the whole DOM over WebDriver - take it once
+        # and let every rule (and debug capture) work from that snapshot
+        page_source = driver.page_source
+        return adapter.parse(page_source, url, driver=driver)
     except Exception as e:
+        # Extraction bugs shouldn't cost us a healthy pooled browser
         return {
             'title': None,
             'price': None,
             'success': False,
-            'error': f'Newegg error: {str(e)}'
-        }
-
-
-def scrape_aliexpress(driver, url):
-    """AliExpress scraper - bulletproof version with JSON extraction"""
-    try:
-        print("🔍 Scraping AliExpress...")
-        time.sleep(6)
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        # TITLE
-        title = None
-        for h1 in soup.find_all('h1'):
-            text = h1.get_text().strip()
-            if len(text) > 10:
-                title = text
-                break
-        
-        if not title:
-            meta = soup.find('meta', {'property': 'og:title'})
-            if meta:
-                title = meta.get('content', '').strip()
-        
-        if not title:
-            title = driver.title.replace(' - AliExpress', '').strip()
-        
-        if not title:
-            title = f"AliExpress Product {url.split('/')[-1].split('.')[0].split('?')[0]}"
-        
-        print(f"📝 Title: {title[:50]}...")
-        
-        # PRICE - ULTIMATE METHOD: Extract from JavaScript window object
-        price = None
-        
-        # Method 1: Execute JavaScript to get price from window.runParams
-        try:
-            js_price = driver.execute_script("""
-                if (window.runParams && window.runParams.data) {
-                    var data = window.runParams.data;
-                    if (data.priceModule && data.priceModule.minActivityAmount) {
-                        return data.priceModule.minActivityAmount.value;
-                    }
-                    if (data.priceModule && data.priceModule.minAmount) {
-                        return data.priceModule.minAmount.value;
-                    }
-                }
-                return null;
-            """)
-            
-            if js_price:
-                price = float(js_price)
-                print(f"💰 Price from JS: ${price}")
-        except:
-            pass
-        
-        # Method 2: Look in page source for JSON data
-        if not price:
-            import json
-            # Find script tags with JSON data
-            scripts = soup.find_all('script')
-            for script in scripts:
-                script_text = script.string
-                if script_text and 'runParams' in script_text:
-                    try:
-                        # Extract JSON from runParams
-                        start = script_text.find('window.runParams')
-                        if start > -1:
-                            json_start = script_text.find('{', start)
-                            json_end = script_text.rfind('}', json_start) + 1
-                            json_str = script_text[json_start:json_end]
-                            
-                            data = json.loads(json_str)
-                            
-                            # Navigate nested JSON to find price
-                            if 'data' in data:
-                                price_module = data['data'].get('priceModule', {})
-                                
-                                # Try different price fields
-                                if 'minActivityAmount' in price_module:
-                                    price = float(price_module['minActivityAmount']['value'])
-                                elif 'minAmount' in price_module:
-                                    price = float(price_module['minAmount']['value'])
-                                elif 'maxActivityAmount' in price_module:
-                                    price = float(price_module['maxActivityAmount']['value'])
-                                
-                                if price:
-                                    print(f"💰 Price from JSON: ${price}")
-                                    break
-                    except:
-                        continue
-        
-        # Method 3: URL parameter extraction (your previous method)
-        if not price:
-            import urllib.parse
-            parsed_url = urllib.parse.unquote(url)
-            
-            # Look for price patterns in URL
-            url_patterns = [
-                r'USD.*?([\d,]+\.?\d{1,2}).*?([\d,]+\.?\d{1,2})',  # Matches "USD 181.96 69.42"
-                r'US\s*\$\s*([\d,]+\.?\d{0,2})',
-            ]
-            
-            for pattern in url_patterns:
-                matches = re.findall(pattern, parsed_url)
-                if matches:
-                    if isinstance(matches[0], tuple):
-                        # Get second price (sale price)
-                        potential_price = extract_price(matches[0][1])
-                    else:
-                        potential_price = extract_price(matches[0])
-                    
-                    if potential_price and 1 <= potential_price <= 10000:
-                        price = potential_price
-                        print(f"💰 Price from URL: ${price}")
-                        break
-        
-        # Method 4: Look for data-spm-anchor-id elements (AliExpress specific)
-        if not price:
-            price_spans = soup.find_all('span', attrs={'data-spm-anchor-id': True})
-            for span in price_spans:
-                text = span.get_text().strip()
-                if '$' in text or 'USD' in text:
-                    potential_price = extract_price(text)
-                    if potential_price and 1 <= potential_price <= 10000:
-                        price = potential_price
-                        print(f"💰 Price from span: ${price}")
-                        break
-        
-        print(f"📊 RESULT - Title: {bool(title)}, Price: ${price if price else 'NOT FOUND'}")
-        
-        if title and price:
-            return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-        else:
-            # If we got title but no price, return with helpful error
-            return {
-                'title': title,
-                'price': price,
-                'success': False,
-                'error': f'AliExpress: Found title but could not extract price. The page may use advanced anti-scraping. Try a different product or use AliExpress.com (not .us)'
-            }
-            
-    except Exception as e:
-        import traceback
-        print(traceback.format_exc())
-        return {'title': None, 'price': None, 'success': False, 'error': f'AliExpress error: {str(e)}'}
-
-def scrape_generic(driver, url):
-    """Generic fallback"""
-    try:
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        title = soup.find('h1')
-        title = title.get_text().strip() if title else None
-        
-        price = None
-        for elem in soup.find_all(class_=re.compile('price', re.I)):
-            price = extract_price(elem.get_text())
-            if price:
-                break
-        
-        if title and price:
-            return {'title': title[:250], 'price': price, 'success': True, 'error': None}
-        return {'title': None, 'price': None, 'success': False, 'error': 'Generic scraper failed'}
-    except Exception as e:
-        return {'title': None, 'price': None, 'success': False, 'error': str(e)}
-
-
-def extract_price(price_text):
-    """Extract price from text"""
-    if not price_text:
-        return None
-    
-    price_text = str(price_text).strip()
-    matches = re.findall(r'[\d,]+\.?\d*', price_text)
-    
-    if not matches:
-        return None
-    
-    price_str = matches[0].replace(',', '')
-    
-    try:
-        price = float(price_str)
-        if 0.01 <= price <= 999999:
-            return round(price, 2)
-    except ValueError:
-        pass
-    
-    return None
\ No newline at end of file
+            'error': f'{adapter.label} error: {str(e)}'
+        }
\ No newline at end of file
@@ -0,0 +1,421 @@
+import json
+import re
+from urllib.parse import urlparse, unquote
+
+import soupsieve
+
+from utils.debug_capture import capture
+from utils.html_parsing import make_soup, json_ld_offer_price
+from utils.price_extraction import extract_price, scan_prices
+
+
+class SiteAdapter:
+    """
+    Declarative description of one retailer, shared by the requests and
+    Selenium backends. Selectors and patterns are compiled once, here.
+
+    title_rules: [{'css': selector, 'min_length': n}] or
+    [{'state': marker, 'paths': [[key, ...], ...]}] tried in order, then
+    og:title. price_rules are tried in order, first hit wins:
+
+        {'css': sel, 'attr': name, 'contains': (...), 'range': (lo, hi)}
+        {'json_ld': True}                         offers.price in JSON-LD
+        {'state': 'window.runParams', 'paths': [[key, ...], ...]}
+                                                  embedded JSON state: the first
+                                                  object after the marker, so
+                                                  'id="__NEXT_DATA__"' works too
+        {'regex': rb'...', 'needle': b'...', 'range': (lo, hi)}
+                                                  scan of the raw page bytes
+        {'url_regex': r'...', 'group': n, 'range': (lo, hi)}
+        {'js': 'return ...'}                      Selenium only
+        {'live_css': sel, 'attr': name}           Selenium only (find_element)
+
+    css rules may give a 'region': a byte regex for the opening tag of the
+    element they read; the region runs on to its balanced closing tag, so
+    nested markup inside it is covered. The requests backend hashes those
+    regions (plus JSON-LD, state blobs and
+    regex matches) to skip parsing unchanged pages; an adapter with a css
+    price rule and no region gets the whole body hashed instead.
+
+    allow_resources: block-profile categories ('css', 'fonts', ...) or URL
+    patterns Chrome must still load for this site's price to render.
+    """
+
+    def __init__(self, name, label, domains=(), backend='requests', tags=None,
+                 title_rules=(), price_rules=(), ready=None, title_from_url=False,
+                 allow_resources=()):
+        self.name = name
+        self.label = label
+        self.domains = tuple(domains)
+        self.backend = backend
+        self.tags = tags
+        self.ready = ready or {'selectors': ['[class*="price"]'], 'network_idle': True, 'timeout': 8}
+        self.title_from_url = title_from_url
+        self.allow_resources = tuple(allow_resources)
+
+        self.title_rules = [self._compile_rule(rule) for rule in title_rules]
+        self.price_rules = [self._compile_rule(rule) for rule in price_rules]
+        self.hash_regions = self._hash_regions()
+
+    @staticmethod
+    def _compile_rule(rule):
+        rule = dict(rule)
+        if 'css' in rule:
+            rule['css'] = soupsieve.compile(rule['css'])
+        if 'regex' in rule:
+            rule['regex'] = re.compile(rule['regex'])
+        if 'url_regex' in rule:
+            rule['url_regex'] = re.compile(rule['url_regex'])
+        if 'state' in rule:
+            rule['state'] = rule['state'].encode()
+        if 'region' in rule:
+            rule['region'] = ElementRegion(rule['region'])
+        return rule
+
+    def _hash_regions(self):
+        """Byte patterns covering everything the static rules read, or None if we can't tell"""
+        regions = [H1_REGION]
+        for rule in self.title_rules + self.price_rules:
+            if 'state' in rule:
+                regions.append(re.compile(re.escape(rule['state']) + rb'.*?</script>', re.S))
+            elif rule.get('json_ld'):
+                regions.append(JSON_LD_REGION)
+            elif 'regex' in rule:
+                regions.append(rule['regex'])
+            elif 'css' in rule and rule in self.price_rules:
+                if 'region' not in rule:
+                    return None
+                regions.append(rule['region'])
+        return list(dict.fromkeys(regions))
+
+    def __repr__(self):
+        return f'<SiteAdapter {self.name}>'
+
+    def parse(self, html_content, url, driver=None):
+        """Run the extraction rules over a page (bytes or str) -> scrape result dict"""
+        raw = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+
+        soup = make_soup(raw, self.tags)
+
+        title = self.find_title(soup, raw)
+        if not title and driver is not None:
+            title = re.split(r'\s[|\-–]\s|\|', driver.title)[0].strip() or None
+        if not title and self.title_from_url:
+            title = f"{self.label} Product {url.split('/')[-1].split('.')[0].split('?')[0]}"
+        print(f"📝 Title: {title[:50] if title else 'NOT FOUND'}...")
+
+        price = self.find_price(soup, raw, url, driver)
+        print(f"💰 Price: ${price if price else 'NOT FOUND'}")
+
+        # Off unless DEBUG_CAPTURE is set; never blocks the scrape
+        saved = capture(self.name, url, raw, bool(title and price))
+
+        if title and price:
+            return {'title': title[:250], 'price': price, 'success': True, 'error': None}
+
+        hint = f' Page saved to {saved}' if saved else ''
+        # The catch-all adapter (no domains) has no selectors worth reporting on
+        error = f'{self.label}: title={bool(title)}, price={bool(price)}.' if self.domains \
+            else f'{self.label} scraper failed.'
+        return {
+            'title': title,
+            'price': price,
+            'success': False,
+            'error': error + hint
+        }
+
+    def find_title(self, soup, raw=b''):
+        for rule in self.title_rules:
+            if 'state' in rule:
+                text = str(state_value(extract_state_blob(raw, rule['state']), rule['paths']) or '').strip()
+                if len(text) >= rule.get('min_length', 1):
+                    return text
+                continue
+            for elem in rule['css'].select(soup):
+                text = elem.get_text().strip()
+                if len(text) >= rule.get('min_length', 1):
+                    return text
+
+        meta = soup.find('meta', {'property': 'og:title'})
+        if meta and meta.get('content', '').strip():
+            return meta['content'].strip()
+        return None
+
+    def find_price(self, soup, raw, url, driver=None):
+        for rule in self.price_rules:
+            try:
+                price = self._apply_price_rule(rule, soup, raw, url, driver)
+            except Exception:
+                price = None
+            if price:
+                return price
+        return None
+
+    def _apply_price_rule(self, rule, soup, raw, url, driver):
+        low, high = rule.get('range', (0.01, 999999))
+
+        def in_range(text):
+            price = extract_price(text)
+            return price if price and low <= price <= high else None
+
+        if 'css' in rule:
+            for elem in rule['css'].select(soup):
+                text = elem.get(rule['attr']) if rule.get('attr') else None
+                text = text or elem.get_text().strip()
+                if rule.get('contains') and not any(c in text for c in rule['contains']):
+                    continue
+                price = in_range(text)
+                if price:
+                    return price
+            return None
+
+        if rule.get('json_ld'):
+            return in_range(json_ld_offer_price(raw))
+
+        if 'state' in rule:
+            return state_value(extract_state_blob(raw, rule['state']), rule['paths'], in_range)
+
+        if 'regex' in rule:
+            return scan_prices(raw, rule['regex'], rule.get('needle'), low, high)
+
+        if 'url_regex' in rule:
+            match = rule['url_regex'].search(unquote(url))
+            return in_range(match.group(rule.get('group', 1))) if match else None
+
+        if driver is None:
+            return None
+
+        if 'js' in rule:
+            return in_range(driver.execute_script(rule['js']))
+
+        if 'live_css' in rule:
+            from selenium.webdriver.common.by import By
+            elem = driver.find_element(By.CSS_SELECTOR, rule['live_css'])
+            return in_range(elem.text or (elem.get_attribute(rule['attr']) if rule.get('attr') else None))
+
+        return None
+
+
+def extract_state_blob(raw, marker):
+    """Decode the JSON object assigned right after `marker` (e.g. b'window.runParams')"""
+    start = raw.find(marker)
+    if start == -1:
+        return None
+    brace = raw.find(b'{', start)
+    if brace == -1:
+        return None
+    try:
+        data, _ = json.JSONDecoder().raw_decode(raw[brace:].decode('utf-8', 'ignore'))
+        return data
+    except ValueError:
+        return None
+
+
+def state_value(data, paths, convert=None):
+    """First truthy value along `paths` in a decoded state blob, optionally converted"""
+    for path in paths if data else []:
+        value = data
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None and convert:
+            value = convert(value)
+        if value:
+            return value
+    return None
+
+
+class ElementRegion:
+    """Opening-tag pattern whose matches extend through the element's balanced closing tag"""
+
+    def __init__(self, opening):
+        self.pattern = re.compile(opening, re.I | re.S)
+        tag = re.match(rb'<(\w+)', opening).group(1)
+        self.tags = re.compile(rb'<(/?)' + tag + rb'\b[^>]*?(/?)>', re.I)
+
+    def chunks(self, content):
+        for match in self.pattern.finditer(content):
+            depth, end = 1, len(content)
+            for tag in self.tags.finditer(content, match.end()):
+                if tag.group(1):
+                    depth -= 1
+                elif not tag.group(2):
+                    depth += 1
+                if not depth:
+                    end = tag.end()
+                    break
+            yield content[match.start():end]
+
+
+def region_chunks(region, content):
+    """The byte slices of `content` a hash region covers"""
+    if isinstance(region, ElementRegion):
+        return region.chunks(content)
+    return (match.group(0) for match in region.finditer(content))
+
+
+# Hashed for every adapter: titles come from the h1 when there's no title rule hit
+H1_REGION = re.compile(rb'<h1[^>]*>.*?</h1>', re.S | re.I)
+JSON_LD_REGION = re.compile(rb'<script[^>]+application/ld\+json[^>]*>.*?</script>', re.S | re.I)
+
+
+# Registry: bare hostname (no www.) -> adapter, and adapter name -> adapter
+SITES = {}
+ADAPTERS = {}
+
+# Byte patterns shared by several sites, with the literal each match starts with
+DOLLAR_PRICE = {'regex': rb'\$\s*([\d,]+\.?\d{2})', 'needle': b'$'}
+DATA_PRICE = {'regex': rb'data-price=["\']([^"\']+)["\']', 'needle': b'data-price='}
+
+
+def register(adapter):
+    for domain in adapter.domains:
+        SITES[domain] = adapter
+    ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+def get_adapter(url):
+    """Adapter for a URL: m.walmart.com -> walmart.com -> GENERIC, all dict lookups"""
+    labels = (urlparse(url).hostname or '').lower().split('.')
+    for i in range(len(labels) - 1):
+        adapter = SITES.get('.'.join(labels[i:]))
+        if adapter:
+            return adapter
+    return GENERIC
+
+
+def get_adapter_by_name(name):
+    """For callers that can only pass a name around (e.g. parse pool processes)"""
+    return ADAPTERS.get(name, GENERIC)
+
+
+WALMART = register(SiteAdapter(
+    'walmart', 'Walmart',
+    domains=['walmart.com', 'walmart.ca'],
+    tags=['h1', 'meta', 'span'],
+    title_rules=[
+        {'css': 'h1[itemprop="name"]'},
+        {'css': 'h1[class*="prod" i][class*="title" i]'},
+        {'css': 'h1'},
+    ],
+    price_rules=[
+        {'state': 'id="__NEXT_DATA__"', 'paths': [
+            ['props', 'pageProps', 'initialData', 'data', 'product', 'priceInfo', 'currentPrice', 'price'],
+        ], 'range': (0.99, 50000)},
+        {'css': 'span[itemprop="price"]', 'attr': 'content',
+         'region': rb'<span[^>]+itemprop=["\']price["\'][^>]*>'},
+        {'css': 'span[aria-label*="price" i]',
+         'region': rb'<span[^>]+aria-label=["\'][^"\']*price[^>]*>'},
+        DATA_PRICE,
+        {'regex': rb'"price"[:\s]+"?([\d,]+\.?\d{0,2})"?', 'needle': b'"price"', 'range': (0.99, 50000)},
+        dict(DOLLAR_PRICE, range=(0.99, 50000)),
+        {'live_css': '[itemprop="price"]', 'attr': 'content'},
+    ],
+    ready={
+        'selectors': ['[itemprop="price"]', '[data-testid="price-wrap"]', '[data-seo-id="hero-price"]'],
+        'timeout': 10,
+    },
+    # live_css reads rendered text: without the stylesheets, hidden "was" and
+    # screen-reader prices show up in it too
+    allow_resources=['css']
+))
+
+BESTBUY = register(SiteAdapter(
+    'bestbuy', 'BestBuy',
+    domains=['bestbuy.com', 'bestbuy.ca'],
+    tags=['h1', 'meta', 'span'],
+    title_rules=[
+        {'css': 'h1[class*="heading" i]'},
+        {'css': 'h1'},
+    ],
+    price_rules=[
+        {'json_ld': True},
+        {'css': 'span[aria-hidden="true"]', 'contains': ('$',), 'range': (0.99, 50000),
+         'region': rb'<span[^>]+aria-hidden=["\']true["\'][^>]*>'},
+        DATA_PRICE,
+        {'live_css': '[class*="priceView"]'},
+        {'regex': rb'"price"[:\s]+([\d,]+\.?\d{0,2})', 'needle': b'"price"', 'range': (9.99, 50000)},
+        dict(DOLLAR_PRICE, range=(9.99, 50000)),
+    ],
+    ready={
+        'selectors': ['[class*="priceView"]', '[data-testid="customer-price"]'],
+        'timeout': 10,
+    },
+    allow_resources=['css']
+))
+
+NEWEGG = register(SiteAdapter(
+    'newegg', 'Newegg',
+    domains=['newegg.com', 'newegg.ca'],
+    tags=['h1', 'meta', 'li'],
+    title_rules=[
+        {'css': 'h1.product-title'},
+        {'css': 'h1'},
+    ],
+    price_rules=[
+        {'css': 'li.price-current',
+         'region': rb'<li[^>]+class=["\'][^"\']*price-current[^>]*>'},
+        {'json_ld': True},
+        {'live_css': '.price-current'},
+        dict(DOLLAR_PRICE, range=(0.99, 50000)),
+    ],
+    ready={
+        'selectors': ['li.price-current strong', '.product-price'],
+        'timeout': 10,
+    },
+    allow_resources=['css']
+))
+
+ALIEXPRESS = register(SiteAdapter(
+    'aliexpress', 'AliExpress',
+    domains=['aliexpress.com', 'aliexpress.us', 'aliexpress.ru'],
+    backend='selenium',
+    tags=['h1', 'meta', 'span'],
+    title_rules=[
+        {'css': 'h1', 'min_length': 10},
+        {'state': 'window.runParams', 'paths': [['data', 'titleModule', 'subject']], 'min_length': 10},
+    ],
+    price_rules=[
+        {'js': """
+            if (window.runParams && window.runParams.data) {
+                var data = window.runParams.data;
+                if (data.priceModule && data.priceModule.minActivityAmount) {
+                    return data.priceModule.minActivityAmount.value;
+                }
+                if (data.priceModule && data.priceModule.minAmount) {
+                    return data.priceModule.minAmount.value;
+                }
+            }
+            return null;
+        """},
+        {'state': 'window.runParams', 'paths': [
+            ['data', 'priceModule', 'minActivityAmount', 'value'],
+            ['data', 'priceModule', 'minAmount', 'value'],
+            ['data', 'priceModule', 'maxActivityAmount', 'value'],
+        ]},
+        {'json_ld': True},
+        # Sale price is the second number in "USD 181.96 69.42"
+        {'url_regex': r'USD.*?([\d,]+\.?\d{1,2}).*?([\d,]+\.?\d{1,2})', 'group': 2, 'range': (1, 10000)},
+        {'url_regex': r'US\s*\$\s*([\d,]+\.?\d{0,2})', 'range': (1, 10000)},
+        {'css': 'span[data-spm-anchor-id]', 'contains': ('$', 'USD'), 'range': (1, 10000),
+         'region': rb'<span[^>]+data-spm-anchor-id[^>]*>'},
+        {'css': 'span[class*="price--current"], span.product-price-value', 'range': (1, 10000),
+         'region': rb'<span[^>]+class=["\'][^"\']*(?:price--current|product-price-value)[^>]*>'},
+    ],
+    ready={
+        'js': "return !!(window.runParams && window.runParams.data && window.runParams.data.priceModule);",
+        'selectors': ['[class*="price--current"]', '[class*="product-price-value"]'],
+        'timeout': 15,
+    }
+))
+
+GENERIC = SiteAdapter(
+    'generic', 'Generic',
+    title_rules=[
+        {'css': 'h1'},
+    ],
+    price_rules=[
+        {'json_ld': True},
+        {'css': '[class*="price" i]'},
+    ]
+)
@@ -0,0 +1,131 @@
+"""
+Scrape worker: runs queued ScrapeJobs outside the web process.
+
+    python worker.py                  # one worker
+    python worker.py --processes 4    # four worker processes
+    python worker.py --scheduler      # also run the due-product dispatcher
+    python worker.py --processes 4 --metrics-port 9100   # /metrics on 9100-9103
+
+Run the web app with SCHEDULER_ENABLED=0 and exactly one --scheduler worker;
+with DISPATCH_TO_WORKERS=1 scheduled re-scrapes are spread over every worker.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+
+_stopping = False
+
+
+def _stop(signum, frame):
+    global _stopping
+    _stopping = True
+    print("🛑 Worker stopping after the current job...")
+
+
+def run_job(job):
+    from app import app, JOB_HANDLERS
+    from models import db
+
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        job.fail(f'Unknown job kind: {job.kind}')
+        db.session.commit()
+        return
+
+    try:
+        result = handler(job.get_payload())
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Job #{job.id} crashed: {traceback.format_exc()}")
+        # Crashes are retried with backoff; scrape failures (below) are not
+        if job.attempts < app.config['JOB_MAX_ATTEMPTS']:
+            job.fail(str(e), retry_in_seconds=30 * 2 ** job.attempts)
+        else:
+            job.fail(str(e))
+        db.session.commit()
+        return
+
+    if result.get('success'):
+        job.finish(result)
+    else:
+        job.fail(result.get('error') or 'Scrape failed')
+    db.session.commit()
+    print(f"{'✅' if job.status == 'done' else '❌'} Job #{job.id} ({job.kind}) {job.status}")
+
+
+def work(worker_name, with_scheduler=False, metrics_port=0):
+    """Claim and run jobs until SIGTERM/SIGINT"""
+    from app import app, start_scheduler
+    from models import ScrapeJob
+    from utils.metrics import serve_metrics
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    # Scrape timings live in this process, so it serves its own /metrics
+    if metrics_port:
+        serve_metrics(metrics_port)
+        print(f"📊 Worker {worker_name} metrics on :{metrics_port}/metrics")
+
+    with app.app_context():
+        if with_scheduler:
+            start_scheduler()
+
+        poll = app.config['JOB_POLL_SECONDS']
+        last_sweep = 0
+        print(f"👷 Worker {worker_name} ready")
+
+        while not _stopping:
+            # Recover jobs from workers that died mid-run
+            if time.monotonic() - last_sweep > 60:
+                requeued, failed = ScrapeJob.requeue_stale(
+                    app.config['JOB_TIMEOUT_MINUTES'], app.config['JOB_MAX_ATTEMPTS']
+                )
+                if requeued or failed:
+                    print(f"♻️ Requeued {requeued} stale jobs, gave up on {failed}")
+                last_sweep = time.monotonic()
+
+            job = ScrapeJob.claim_next(worker_name)
+            if job is None:
+                time.sleep(poll)
+                continue
+
+            print(f"👷 {worker_name} running job #{job.id} ({job.kind})")
+            run_job(job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run scrape job workers')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes to start')
+    parser.add_argument('--scheduler', action='store_true', help='also run the due-product dispatcher')
+    parser.add_argument('--metrics-port', type=int, default=int(os.environ.get('WORKER_METRICS_PORT', 0)),
+                        help='serve /metrics here (worker i of --processes uses port + i); 0 disables')
+    args = parser.parse_args()
+
+    base_name = f'{socket.gethostname()}:{os.getpid()}'
+    if args.processes <= 1:
+        work(base_name, args.scheduler, args.metrics_port)
+        return
+
+    # Fresh interpreters, so each worker gets its own DB connections and browsers
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=work, args=(f'{base_name}/{i}', args.scheduler and i == 0,
+                                           args.metrics_port + i if args.metrics_port else 0))
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: [p.terminate() for p in processes])
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()